@@ -18,6 +18,7 @@ from fastapi.templating import Jinja2Templates
 from src.api.routes import jobs, dashboard, destinations
 from src.core.config import Config
 from src.core.database import Database
+from src.services import _metrics
 from src.services.destination_manager import DestinationManager
 from src.services.job_manager import JobManager
 from src.services.scheduler import Scheduler
@@ -52,6 +53,9 @@ async def startup_event():
     """Initialize application components"""
     logger.info("Starting Network Stats Collector...")
 
+    # SIGUSR1 dumps the in-process performance counters (no-op on Windows)
+    _metrics.install_signal_handler()
+
     # Load configuration
     config_path = Path("config/app.yaml")
     if not config_path.exists():
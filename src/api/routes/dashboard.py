@@ -115,7 +115,7 @@ async def get_dashboard(request):
 
         # Get recent metrics (last 24 hours)
         yesterday = datetime.now(timezone.utc) - timedelta(hours=24)
-        recent_metrics_db = await db.get_metrics(
+        recent_metrics_db = await db.get_metrics_raw(
             start_time=yesterday,
             limit=100
         )
@@ -237,7 +237,7 @@ async def get_recent_metrics(
         db = request.app.state.db
 
         # Get recent metrics
-        recent_metrics_db = await db.get_metrics(
+        recent_metrics_db = await db.get_metrics_raw(
             job_id=job_id,
             host=host,
             limit=limit
@@ -281,14 +281,36 @@ async def get_metrics_statistics(
         end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(hours=hours)
 
-        # Get metrics for analysis
-        metrics = await db.get_metrics(
+        # Stream metrics and accumulate statistics without materializing the range
+        total_metrics = 0
+        successful_count = 0
+        response_time_sum = 0.0
+        response_time_count = 0
+        min_response_time = None
+        max_response_time = None
+        metric_types = set()
+        hosts = set()
+
+        async for m in db.iter_metrics(
             job_id=job_id,
             start_time=start_time,
             end_time=end_time
-        )
-
-        if not metrics:
+        ):
+            total_metrics += 1
+            metric_types.add(m.metric_type)
+            hosts.add(m.host)
+
+            if m.status == "success":
+                successful_count += 1
+                if m.response_time_ms is not None:
+                    response_time_sum += m.response_time_ms
+                    response_time_count += 1
+                    if min_response_time is None or m.response_time_ms < min_response_time:
+                        min_response_time = m.response_time_ms
+                    if max_response_time is None or m.response_time_ms > max_response_time:
+                        max_response_time = m.response_time_ms
+
+        if not total_metrics:
             return {
                 "total_metrics": 0,
                 "success_rate": 0.0,
@@ -299,20 +321,10 @@ async def get_metrics_statistics(
                 "hosts": []
             }
 
-        # Calculate statistics
-        total_metrics = len(metrics)
-        successful_metrics = [m for m in metrics if m.status == "success"]
-        success_rate = len(successful_metrics) / total_metrics * 100
-
-        # Response time statistics
-        response_times = [m.response_time_ms for m in successful_metrics if m.response_time_ms is not None]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else None
-        min_response_time = min(response_times) if response_times else None
-        max_response_time = max(response_times) if response_times else None
-
-        # Unique metric types and hosts
-        metric_types = list(set(m.metric_type for m in metrics))
-        hosts = list(set(m.host for m in metrics))
+        success_rate = successful_count / total_metrics * 100
+        avg_response_time = response_time_sum / response_time_count if response_time_count else None
+        metric_types = list(metric_types)
+        hosts = list(hosts)
 
         return {
             "total_metrics": total_metrics,
@@ -380,11 +380,12 @@ async def get_job_metrics(
             raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
 
         # Get metrics from database
-        metrics = await db.get_metrics(
+        metrics = await db.get_metrics_raw(
             job_id=job_id,
             start_time=start_time,
             end_time=end_time,
-            limit=limit
+            limit=limit,
+            with_additional_data=True
         )
 
         # Convert to response format
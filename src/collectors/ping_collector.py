@@ -13,6 +13,35 @@ from typing import Dict, List, Optional, Any
 
 logger = logging.getLogger(__name__)
 
+
+def _ping_stats(rtts: List[float]) -> tuple:
+    """Aggregate reply times in a single pass
+
+    Returns (avg, min, max, jitter) where jitter is the population
+    standard deviation, computed from the running sum of squares so the
+    list is traversed once instead of the five passes that separate
+    sum/min/max/variance calls would take. For millisecond-scale values
+    the sum-of-squares form loses no meaningful precision.
+    """
+    n = len(rtts)
+    total = 0.0
+    total_sq = 0.0
+    lo = hi = rtts[0]
+    for t in rtts:
+        total += t
+        total_sq += t * t
+        if t < lo:
+            lo = t
+        elif t > hi:
+            hi = t
+
+    avg = total / n
+    if n < 2:
+        return avg, lo, hi, None
+    variance = max(total_sq / n - avg * avg, 0.0)
+    return avg, lo, hi, round(variance ** 0.5, 2)
+
+
 class PingCollector:
     """Collector for ping-based network testing"""
 
@@ -39,15 +68,19 @@ class PingCollector:
             # Build ping command for Windows
             cmd = self._build_ping_command(host, count, timeout)
 
-            # Execute ping command
+            # Execute ping command. The subprocess runs through the event
+            # loop's child watcher, so the ICMP wait never blocks the loop
+            # and no thread-pool offload is needed. asyncio subprocess pipes
+            # are bytes-only (text=True is not supported), so decode here.
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                text=True
+                stderr=asyncio.subprocess.PIPE
             )
 
             stdout, stderr = await process.communicate()
+            stdout = stdout.decode(errors='replace')
+            stderr = stderr.decode(errors='replace')
 
             if process.returncode == 0:
                 return self._parse_ping_output(stdout, host)
@@ -136,10 +169,7 @@ class PingCollector:
 
             # Calculate results
             if reply_times:
-                avg_time = sum(reply_times) / len(reply_times)
-                min_time = min(reply_times)
-                max_time = max(reply_times)
-                jitter = self._calculate_jitter(reply_times)
+                avg_time, min_time, max_time, jitter = _ping_stats(reply_times)
             else:
                 avg_time = min_time = max_time = jitter = None
 
@@ -259,6 +289,9 @@ class PingCollector:
         """
         Calculate jitter (variation in response times)
 
+        Kept for callers that only need jitter; the parse path uses
+        _ping_stats to get all aggregates in one pass.
+
         Args:
             response_times: List of response times in milliseconds
 
@@ -268,16 +301,7 @@ class PingCollector:
         if len(response_times) < 2:
             return None
 
-        try:
-            # Calculate standard deviation of response times
-            avg = sum(response_times) / len(response_times)
-            variance = sum((time - avg) ** 2 for time in response_times) / len(response_times)
-            jitter = variance ** 0.5
-
-            return round(jitter, 2)
-
-        except Exception:
-            return None
+        return _ping_stats(response_times)[3]
 
     async def ping_batch(self, hosts: List[str], count: int = None, timeout: int = None) -> List[Dict[str, Any]]:
         """
@@ -5,17 +5,30 @@ Handles time-series data storage and retrieval using SQLAlchemy with SQLite.
 Optimized for network metrics storage and fast querying.
 """
 
+import asyncio
+import json
 import logging
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from decimal import Decimal
 
 import aiosqlite
+
+try:
+    # C JSON codec, several times faster than stdlib json on the ingest
+    # path; installed via the 'speedups' extra
+    import orjson
+except ImportError:
+    orjson = None
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Text, Float, Boolean,
-    Index, create_engine, MetaData, Table, select, insert, update, delete,
-    ForeignKey
+    Column, Integer, SmallInteger, BigInteger, String, DateTime, Text, Float,
+    Boolean, Index, create_engine, MetaData, Table, select, insert, update,
+    delete, ForeignKey, text, bindparam, func, case, column, tuple_, event,
+    TypeDecorator, or_, and_
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.pool import StaticPool
@@ -25,6 +38,56 @@ logger = logging.getLogger(__name__)
 # Base class for ORM models
 Base = declarative_base()
 
+def _to_epoch_us(ts: datetime) -> int:
+    """Convert a datetime to the stored epoch-microseconds representation"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1_000_000)
+
+class EpochMicroseconds(TypeDecorator):
+    """DateTime stored as integer microseconds since the Unix epoch
+
+    An 8-byte integer key compares and packs far better in SQLite B-trees
+    than the ~27-byte ISO string the stock DateTime type produces, which
+    shrinks the time-series indexes and makes range filters integer
+    comparisons. Values convert transparently at bind/result time and are
+    UTC datetimes on the Python side.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return int(value)
+        return _to_epoch_us(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return datetime.fromtimestamp(value / 1_000_000, tz=timezone.utc)
+
+# Integer codes for the enum-like metric columns. Storing SmallInteger
+# instead of text shrinks rows and the hot composite indexes and turns
+# B-tree comparisons into integer compares; codes are translated back to
+# their names at the Database API boundary so callers keep using strings.
+STATUS_CODES = {'success': 1, 'failure': 2, 'timeout': 3}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+# Some writers use the legacy 'failed' spelling
+_STATUS_ENCODE = {**STATUS_CODES, 'failed': STATUS_CODES['failure']}
+METRIC_TYPE_CODES = {'ping': 1, 'traceroute': 2, 'dns': 3,
+                     'bandwidth': 4, 'jitter': 5, 'packet_loss': 6}
+METRIC_TYPE_NAMES = {code: name for name, code in METRIC_TYPE_CODES.items()}
+
+# Current time as epoch microseconds, evaluated by SQLite at insert.
+# 2440587.5 is the Julian day of the Unix epoch; julianday('now') works
+# on every SQLite this project can meet, unlike unixepoch('subsec')
+# which needs >= 3.42 and silently returns NULL before that.
+_EPOCH_US_NOW = text(
+    "(CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER))"
+)
+
 class Destination(Base):
     """Global destination configuration"""
     __tablename__ = "destinations"
@@ -36,14 +99,18 @@ class Destination(Base):
     description = Column(Text, nullable=True)  # Optional description
     tags = Column(Text, nullable=True)  # JSON array of tags
     status = Column(String(20), nullable=False, default="active", index=True)  # active, inactive, error
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    config_hash = Column(String(16), nullable=True, index=True)  # blake2b of config fields, to skip no-op syncs
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     last_seen = Column(DateTime, nullable=True)  # Last time destination was reachable
 
     # Indexes for common queries
     __table_args__ = (
         Index('idx_host_status', 'host', 'status'),
         Index('idx_name_active', 'name', 'status'),
+        # No expression index on lower(name): the search filter is a
+        # substring LIKE ('%query%'), whose leading wildcard makes any
+        # such index unusable — it would be pure write amplification.
     )
 
 class Job(Base):
@@ -70,14 +137,17 @@ class Job(Base):
 
     # Metadata
     tags = Column(Text, nullable=True)  # JSON array of tags
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     # Indexes for common queries
     __table_args__ = (
         Index('idx_name_enabled', 'name', 'enabled'),
         Index('idx_status_scheduled', 'status', 'next_run'),
         Index('idx_active_jobs', 'enabled', 'status'),
+        # Backs the scheduler's missed-job sweep: enabled jobs whose
+        # next_run has passed become a bounded range scan
+        Index('idx_jobs_enabled_next_run', 'enabled', 'next_run'),
     )
 
 class MetricRecord(Base):
@@ -85,23 +155,42 @@ class MetricRecord(Base):
     __tablename__ = "metrics"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    timestamp = Column(DateTime, nullable=False, index=True)
+    timestamp = Column(EpochMicroseconds, nullable=False)  # Covered by the composite indexes below
     job_id = Column(Integer, nullable=False, index=True)  # Foreign key reference to jobs.id
     destination_id = Column(Integer, nullable=False, index=True)  # Foreign key reference to destinations.id
     host = Column(String(255), nullable=False, index=True)  # Denormalized for query performance
-    metric_type = Column(String(50), nullable=False, index=True)
-    status = Column(String(20), nullable=False, index=True)  # success, failure, timeout
+    metric_type = Column(SmallInteger, nullable=False, index=True)  # Code from METRIC_TYPE_CODES
+    status = Column(SmallInteger, nullable=False, index=True)  # Code from STATUS_CODES
     response_time_ms = Column(Float, nullable=True)  # Response time in milliseconds
     additional_data = Column(Text, nullable=True)  # JSON string for metric-specific data
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Filled by SQLite at insert time; avoids a datetime allocation per row.
+    # julianday rather than unixepoch('subsec'): the latter needs SQLite
+    # >= 3.42 and silently yields NULL on anything older. NOT NULL so an
+    # incompatible build fails loudly instead of dropping timestamps.
+    created_at = Column(EpochMicroseconds, nullable=False,
+                        server_default=_EPOCH_US_NOW)
 
     # Composite indexes for common queries
     __table_args__ = (
-        Index('idx_job_destination_timestamp', 'job_id', 'destination_id', 'timestamp'),
-        Index('idx_job_host_timestamp', 'job_id', 'host', 'timestamp'),
-        Index('idx_metric_type_timestamp', 'metric_type', 'timestamp'),
+        # Covering index for the hot read path: queries selecting METRIC_COLS
+        # filtered by (job_id, destination_id, timestamp range) are answered
+        # from the index alone, with no rowid lookups back into the table.
+        # Its (job_id, destination_id, timestamp) prefix also serves every
+        # query the former idx_job_destination_timestamp handled, so that
+        # index is gone — one less B-tree to maintain per insert.
+        Index('idx_metrics_cover', 'job_id', 'destination_id', 'timestamp',
+              'status', 'metric_type', 'response_time_ms'),
+        # Descending time components match the ORDER BY timestamp DESC used
+        # by the read paths, so the planner scans the index tail directly
+        # instead of sorting or walking backwards
+        Index('idx_job_host_ts_desc', 'job_id', 'host', timestamp.desc()),
+        Index('idx_metric_type_ts_desc', 'metric_type', timestamp.desc()),
         Index('idx_status_timestamp', 'status', 'timestamp'),
         Index('idx_destination_metrics', 'destination_id', 'timestamp'),
+        # Partial index for failure lookups: sized by failure count, not
+        # total metrics, since success rows (status == 1) are excluded
+        Index('idx_metric_failures', 'destination_id', timestamp.desc(),
+              sqlite_where=text("status != 1")),
     )
 
 class JobRun(Base):
@@ -110,20 +199,188 @@ class JobRun(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     job_id = Column(Integer, nullable=False, index=True)  # Foreign key reference to jobs.id
-    start_time = Column(DateTime, nullable=False)
-    end_time = Column(DateTime, nullable=True)
+    start_time = Column(EpochMicroseconds, nullable=False)
+    end_time = Column(EpochMicroseconds, nullable=True)
     status = Column(String(20), nullable=False, default="running")  # running, completed, failed
     total_destinations = Column(Integer, nullable=False)  # Renamed from total_hosts for clarity
     successful_destinations = Column(Integer, default=0)  # Renamed from successful_hosts
     failed_destinations = Column(Integer, default=0)  # Renamed from failed_hosts
     error_message = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(EpochMicroseconds, nullable=False,
+                        server_default=_EPOCH_US_NOW)
 
     # Indexes for common queries
     __table_args__ = (
         Index('idx_job_status_time', 'job_id', 'status', 'start_time'),
     )
 
+# Precompiled parametric statements for hot single-row paths. Building these
+# once at import time avoids re-running SQLAlchemy statement construction on
+# every call; values are supplied as bound parameters at execution time.
+_STMT_GET_DEST = select(Destination).where(Destination.id == bindparam('id'))
+_STMT_GET_JOB = select(Job).where(Job.id == bindparam('id'))
+_STMT_INSERT_METRIC = insert(MetricRecord)
+
+# Columns served by the metric read path. Selecting these directly through
+# Core returns lightweight Row tuples that serialize straight to JSON,
+# skipping per-row ORM instantiation, identity-map and attribute
+# instrumentation overhead. additional_data is deliberately excluded so the
+# covering index can answer these queries; callers that need the payload
+# pass with_additional_data=True.
+_metric_table = MetricRecord.__table__
+METRIC_COLS = (
+    _metric_table.c.id,
+    _metric_table.c.timestamp,
+    _metric_table.c.job_id,
+    _metric_table.c.destination_id,
+    _metric_table.c.host,
+    # Decode the integer codes back to names in SQL so rows carry strings
+    case(METRIC_TYPE_NAMES, value=_metric_table.c.metric_type).label('metric_type'),
+    case(STATUS_NAMES, value=_metric_table.c.status).label('status'),
+    _metric_table.c.response_time_ms,
+)
+
+@dataclass(slots=True)
+class MetricRow:
+    """Lightweight view of a metric row for hot read paths
+
+    Field order matches METRIC_COLS so instances can be built positionally
+    from Core rows. slots=True drops the per-instance __dict__, which is
+    most of the allocation cost when thousands of rows are materialized.
+    """
+    id: int
+    timestamp: datetime
+    job_id: int
+    destination_id: Optional[int]
+    host: str
+    metric_type: str
+    status: str
+    response_time_ms: Optional[float]
+    additional_data: Optional[str] = None
+
+def _dump_json(obj: Any) -> str:
+    """Serialize metric payloads, preferring orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+def _encode_metric(metric_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate string status/metric_type to their integer codes for storage
+
+    Also serializes a dict/list additional_data payload here, so collectors
+    can hand over plain structures and serialization happens once at the
+    storage boundary with the fastest available codec.
+    """
+    data = dict(metric_data)
+    if isinstance(data.get('status'), str):
+        data['status'] = _STATUS_ENCODE[data['status']]
+    if isinstance(data.get('metric_type'), str):
+        data['metric_type'] = METRIC_TYPE_CODES[data['metric_type']]
+    if isinstance(data.get('additional_data'), (dict, list)):
+        data['additional_data'] = _dump_json(data['additional_data'])
+    return data
+
+def _decode_case_sql(col_name: str, names: Dict[int, str]) -> str:
+    """Raw-SQL CASE expression decoding an integer code column to its name"""
+    branches = ' '.join(f"WHEN {code} THEN '{name}'" for code, name in names.items())
+    return f"CASE {col_name} {branches} END AS {col_name}"
+
+class MetricBuffer:
+    """Coalesces metric inserts into batched transactions
+
+    Incoming rows are queued and a background task flushes them once 500
+    rows are pending or 100 ms have elapsed, whichever comes first. Each
+    flush is one executemany under one transaction, so ingest pays a
+    single fsync per batch instead of one per metric, and the prepared
+    insert statement is reused across the whole batch.
+    """
+
+    def __init__(self, database: "Database", max_rows: int = 500, max_delay: float = 0.1):
+        self.db = database
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background flush task"""
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush task and write out any queued rows"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self._flush(self._drain())
+        except Exception as e:
+            logger.error(f"Failed to flush metrics on shutdown: {e}")
+
+    def put(self, metric_data: Dict[str, Any]):
+        """Queue a metric row for the next batched flush"""
+        self._queue.put_nowait(_encode_metric(metric_data))
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return rows
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        rows: List[Dict[str, Any]] = []
+        try:
+            while True:
+                # Block for the first row, then collect until the batch is
+                # full or the flush deadline passes
+                rows = [await self._queue.get()]
+                deadline = loop.time() + self.max_delay
+                while len(rows) < self.max_rows:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        rows.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                try:
+                    await self._flush(rows)
+                except Exception as e:
+                    logger.error(f"Failed to flush {len(rows)} metrics: {e}")
+                rows = []
+        except asyncio.CancelledError:
+            # Cancellation from stop() can land mid-batch; rows already
+            # pulled off the queue would otherwise be lost, since stop()
+            # only drains what is still queued
+            if rows:
+                try:
+                    await self._flush(rows)
+                except Exception as e:
+                    logger.error(f"Failed to flush {len(rows)} metrics on cancel: {e}")
+            raise
+
+    async def _flush(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+
+        # executemany needs uniform parameter keys, so group rows that
+        # carry different optional columns; all groups share one transaction
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        async with self.db.engine.begin() as conn:
+            for group in groups.values():
+                await conn.execute(_STMT_INSERT_METRIC, group)
+
 class Database:
     """Database manager for network stats collector"""
 
@@ -137,14 +394,23 @@ class Database:
         self.database_url = database_url
         self.engine = None
         self.async_session_maker = None
+        self.async_session = None
         self._initialized = False
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self.metric_buffer = MetricBuffer(self)
 
     async def initialize(self):
         """Initialize database connection and create tables"""
         try:
             # Create async engine with SQLite specific settings
             if self.database_url.startswith("sqlite"):
-                # For SQLite, add connection pooling and other optimizations
+                # For SQLite, add connection pooling and other optimizations.
+                # Note: aiosqlite proxies every statement to a worker thread
+                # (~10us per hop). A sync sqlite3 driver bridged with
+                # asyncer/greenlet would avoid that, but the streaming and
+                # ATTACH-shard code here depends on the aiosqlite dialect, so
+                # we keep it and instead minimize the number of round trips
+                # (batching, precompiled statements) on the hot paths.
                 async_url = self.database_url.replace("sqlite:///", "sqlite+aiosqlite:///")
                 self.engine = create_async_engine(
                     async_url,
@@ -155,20 +421,56 @@ class Database:
                     },
                     echo=False,  # Set to True for SQL debugging
                 )
+
+                if ":memory:" not in async_url:
+                    # Tune every new SQLite connection for a write-heavy
+                    # time-series workload: WAL avoids the fsync-per-commit of
+                    # the rollback journal and lets readers run alongside the
+                    # writer; synchronous=NORMAL is durable enough under WAL.
+                    @event.listens_for(self.engine.sync_engine, "connect")
+                    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+                        cursor = dbapi_connection.cursor()
+                        for pragma in (
+                            "PRAGMA journal_mode=WAL",
+                            "PRAGMA synchronous=NORMAL",
+                            "PRAGMA temp_store=MEMORY",
+                            "PRAGMA mmap_size=1073741824",
+                            "PRAGMA cache_size=-65536",
+                            "PRAGMA busy_timeout=5000",
+                        ):
+                            cursor.execute(pragma)
+                        cursor.close()
             else:
-                # For other databases
+                # For other databases, size the pool for the scheduler's job
+                # fan-out plus a little API headroom. SQLite stays on
+                # StaticPool above (one shared connection), so these knobs
+                # only apply here.
                 async_url = self.database_url
-                self.engine = create_async_engine(async_url, echo=False)
+                self.engine = create_async_engine(
+                    async_url,
+                    pool_size=8,
+                    max_overflow=0,
+                    echo=False,
+                )
 
-            # Create session factory
+            # Create session factory. expire_on_commit=False keeps ORM
+            # objects readable after commit without a refresh round trip.
+            # async_session is the public alias service code calls directly.
             self.async_session_maker = async_sessionmaker(
                 self.engine, class_=AsyncSession, expire_on_commit=False
             )
+            self.async_session = self.async_session_maker
 
             # Create tables
             async with self.engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
 
+            # Periodic WAL checkpoint keeps the WAL file bounded and avoids
+            # the long-commit spike of an unplanned large checkpoint
+            if self.database_url.startswith("sqlite") and ":memory:" not in self.database_url:
+                self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+
+            self.metric_buffer.start()
             self._initialized = True
             logger.info(f"Database initialized: {self.database_url}")
 
@@ -176,8 +478,29 @@ class Database:
             logger.error(f"Failed to initialize database: {e}")
             raise
 
+    async def _maintenance_loop(self):
+        """Background loop truncating the WAL and refreshing planner statistics"""
+        while True:
+            try:
+                await asyncio.sleep(900)  # Every 15 minutes
+                async with self.engine.connect() as conn:
+                    await conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+                    await conn.execute(text("PRAGMA optimize"))
+                    await conn.commit()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Database maintenance failed: {e}")
+
     async def cleanup(self):
         """Cleanup database connections"""
+        await self.metric_buffer.stop()
+        if self._maintenance_task and not self._maintenance_task.done():
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
         if self.engine:
             await self.engine.dispose()
             logger.info("Database connections cleaned up")
@@ -203,6 +526,31 @@ class Database:
                 logger.error(f"Failed to create destination: {e}")
                 raise
 
+    async def upsert_destination(self, destination_data: Dict[str, Any]) -> int:
+        """Create or update a destination keyed by its unique name
+
+        Uses SQLite's INSERT .. ON CONFLICT DO UPDATE .. RETURNING so
+        idempotent apply-desired-state callers get one statement, one
+        commit and one index probe instead of a try-insert-then-update
+        round trip.
+        """
+        self._ensure_initialized()
+
+        async with self.async_session_maker() as session:
+            try:
+                stmt = sqlite_insert(Destination).values(**destination_data)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['name'],
+                    set_={k: stmt.excluded[k] for k in destination_data if k != 'name'}
+                ).returning(Destination.id)
+                result = await session.execute(stmt)
+                await session.commit()
+                return result.scalar_one()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Failed to upsert destination: {e}")
+                raise
+
     async def get_destinations(self, active_only: bool = True) -> List[Destination]:
         """Get all destinations"""
         self._ensure_initialized()
@@ -226,20 +574,82 @@ class Database:
 
         async with self.async_session_maker() as session:
             try:
-                query = select(Destination).where(Destination.id == destination_id)
-                result = await session.execute(query)
+                result = await session.execute(_STMT_GET_DEST, {'id': destination_id})
                 return result.scalar_one_or_none()
             except Exception as e:
                 logger.error(f"Failed to get destination {destination_id}: {e}")
                 raise
 
+    async def search_destinations(self,
+                                 query: Optional[str] = None,
+                                 status: Optional[str] = None,
+                                 tags: Optional[List[str]] = None) -> List[Destination]:
+        """Search destinations with all filtering done in SQL
+
+        Substring matching, status filtering and tag membership (via
+        json_each over the JSON tags column) all run inside SQLite, so only
+        matching rows are materialized into Python.
+        """
+        self._ensure_initialized()
+
+        async with self.async_session_maker() as session:
+            try:
+                stmt = select(Destination)
+
+                if status:
+                    stmt = stmt.where(Destination.status == status)
+
+                if tags:
+                    # Rows written before the JSON migration hold str(list)
+                    # text that makes json_each abort the whole query;
+                    # json_valid keeps them out of the filter instead.
+                    # (Such rows cannot match a tag anyway until the config
+                    # upsert rewrites them as proper JSON.)
+                    stmt = stmt.where(func.json_valid(Destination.tags) == 1)
+                    # Every requested tag must appear in the JSON tags array
+                    for tag in tags:
+                        tag_entry = func.json_each(Destination.tags).table_valued('value')
+                        stmt = stmt.where(
+                            select(tag_entry.c.value)
+                            .where(tag_entry.c.value == tag)
+                            .exists()
+                        )
+
+                if query:
+                    pattern = f"%{query.lower()}%"
+                    stmt = stmt.where(or_(
+                        func.lower(Destination.name).like(pattern),
+                        func.lower(Destination.display_name).like(pattern),
+                        func.lower(Destination.host).like(pattern),
+                        func.lower(Destination.description).like(pattern),
+                    ))
+
+                stmt = stmt.order_by(Destination.display_name)
+                result = await session.execute(stmt)
+                return result.scalars().all()
+            except Exception as e:
+                logger.error(f"Failed to search destinations: {e}")
+                raise
+
+    async def get_destination_by_name(self, name: str) -> Optional[Destination]:
+        """Get a specific destination by its unique name"""
+        self._ensure_initialized()
+
+        async with self.async_session_maker() as session:
+            try:
+                query = select(Destination).where(Destination.name == name).limit(1)
+                result = await session.execute(query)
+                return result.scalar_one_or_none()
+            except Exception as e:
+                logger.error(f"Failed to get destination '{name}': {e}")
+                raise
+
     async def update_destination(self, destination_id: int, update_data: Dict[str, Any]) -> bool:
         """Update a destination"""
         self._ensure_initialized()
 
         async with self.async_session_maker() as session:
             try:
-                update_data['updated_at'] = datetime.now(timezone.utc)
                 stmt = update(Destination).where(Destination.id == destination_id).values(**update_data)
                 result = await session.execute(stmt)
                 await session.commit()
@@ -249,6 +659,109 @@ class Database:
                 logger.error(f"Failed to update destination {destination_id}: {e}")
                 raise
 
+    async def checkpoint(self, mode: str = "PASSIVE") -> None:
+        """Fold WAL pages back into the main database file
+
+        PASSIVE never blocks readers or writers; callers that need the WAL
+        truncated should rely on the periodic maintenance loop instead.
+        """
+        if not self.database_url.startswith("sqlite") or ":memory:" in self.database_url:
+            return
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text(f"PRAGMA wal_checkpoint({mode})"))
+        except Exception as e:
+            logger.warning(f"WAL checkpoint failed: {e}")
+
+    async def upsert_destinations(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert-or-update many destinations with one UPSERT statement
+
+        A single multi-row INSERT ... ON CONFLICT(name) DO UPDATE lets
+        SQLite reconcile the whole list server-side in one round trip and
+        one transaction, instead of a Python-side diff plus per-row writes.
+        """
+        self._ensure_initialized()
+
+        if not rows:
+            return 0
+
+        try:
+            stmt = sqlite_insert(Destination).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['name'],
+                set_={
+                    'host': stmt.excluded.host,
+                    'display_name': stmt.excluded.display_name,
+                    'description': stmt.excluded.description,
+                    'tags': stmt.excluded.tags,
+                    'status': stmt.excluded.status,
+                    'config_hash': stmt.excluded.config_hash,
+                },
+                # Unchanged rows (same config hash) write nothing, so a
+                # restart with a stable config costs no WAL pages
+                where=Destination.config_hash.is_distinct_from(stmt.excluded.config_hash)
+            )
+            async with self.engine.begin() as conn:
+                await conn.execute(stmt)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to upsert destinations: {e}")
+            raise
+
+    async def bulk_create_destinations(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert many destinations via one executemany in a single transaction
+
+        All rows must share the same keys. Used by the config sync path so
+        startup costs one commit/fsync regardless of destination count.
+        """
+        self._ensure_initialized()
+
+        if not rows:
+            return 0
+
+        async with self.async_session_maker() as session:
+            try:
+                await session.execute(insert(Destination), rows)
+                await session.commit()
+                return len(rows)
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Failed to bulk create destinations: {e}")
+                raise
+
+    async def bulk_update_destinations(self, updates: List[Dict[str, Any]]) -> int:
+        """Update many destinations via one executemany in a single transaction
+
+        Each dict carries the destination 'id' plus the columns to set; all
+        rows must share the same keys so the prepared statement can be
+        reused executemany-style, giving one commit/fsync for the batch.
+        Runs on a Core connection: the ORM session refuses executemany
+        UPDATEs with extra WHERE criteria (it cannot synchronize persistent
+        objects for them), and there is nothing identity-mapped to sync.
+        """
+        self._ensure_initialized()
+
+        if not updates:
+            return 0
+
+        try:
+            value_cols = [k for k in updates[0] if k != 'id']
+            stmt = (
+                update(Destination)
+                .where(Destination.id == bindparam('dest_id'))
+                .values({k: bindparam(k) for k in value_cols})
+            )
+            rows = [
+                {'dest_id': u['id'], **{k: u[k] for k in value_cols}}
+                for u in updates
+            ]
+            async with self.engine.begin() as conn:
+                await conn.execute(stmt, rows)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to bulk update destinations: {e}")
+            raise
+
     async def delete_destination(self, destination_id: int) -> bool:
         """Delete a destination"""
         self._ensure_initialized()
@@ -280,6 +793,25 @@ class Database:
                 logger.error(f"Failed to create job: {e}")
                 raise
 
+    async def upsert_job(self, job_data: Dict[str, Any]) -> int:
+        """Create or update a job keyed by its unique name in one statement"""
+        self._ensure_initialized()
+
+        async with self.async_session_maker() as session:
+            try:
+                stmt = sqlite_insert(Job).values(**job_data)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['name'],
+                    set_={k: stmt.excluded[k] for k in job_data if k != 'name'}
+                ).returning(Job.id)
+                result = await session.execute(stmt)
+                await session.commit()
+                return result.scalar_one()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Failed to upsert job: {e}")
+                raise
+
     async def get_jobs(self, enabled_only: bool = False) -> List[Job]:
         """Get all jobs"""
         self._ensure_initialized()
@@ -303,8 +835,7 @@ class Database:
 
         async with self.async_session_maker() as session:
             try:
-                query = select(Job).where(Job.id == job_id)
-                result = await session.execute(query)
+                result = await session.execute(_STMT_GET_JOB, {'id': job_id})
                 return result.scalar_one_or_none()
             except Exception as e:
                 logger.error(f"Failed to get job {job_id}: {e}")
@@ -316,7 +847,6 @@ class Database:
 
         async with self.async_session_maker() as session:
             try:
-                update_data['updated_at'] = datetime.now(timezone.utc)
                 stmt = update(Job).where(Job.id == job_id).values(**update_data)
                 result = await session.execute(stmt)
                 await session.commit()
@@ -342,53 +872,92 @@ class Database:
                 raise
 
     # Metric Management Methods (Updated for new schema)
-    async def store_metric(self, metric_data: Dict[str, Any]) -> int:
-        """Store a single metric record"""
-        self._ensure_initialized()
+    async def store_metric(self, metric_data: Dict[str, Any]) -> None:
+        """Queue a single metric record for batched insertion
 
-        async with self.async_session_maker() as session:
-            try:
-                stmt = insert(MetricRecord).values(**metric_data)
-                result = await session.execute(stmt)
-                await session.commit()
-                return result.inserted_primary_key[0]
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"Failed to store metric: {e}")
-                raise
+        Rows are coalesced by the metric buffer and committed one batch at
+        a time; use store_metrics_batch when the generated ids are needed
+        synchronously.
+        """
+        self._ensure_initialized()
+        self.metric_buffer.put(metric_data)
 
     async def store_metrics_batch(self, metrics_data: List[Dict[str, Any]]) -> List[int]:
-        """Store multiple metric records in a batch"""
+        """Store multiple metric records in a batch, returning their ids
+
+        Uses Core insert().returning() so SQLite's RETURNING yields the new
+        ids in one statement — no per-row ORM unit-of-work or post-insert
+        refresh. When ids are not needed, prefer store_metrics_batch_fast.
+        """
         self._ensure_initialized()
 
         if not metrics_data:
             return []
 
-        async with self.async_session_maker() as session:
-            try:
-                stmt = insert(MetricRecord).return_values(MetricRecord.id)
-                result = await session.execute(stmt, metrics_data)
-                await session.commit()
-                return [row[0] for row in result.fetchall()]
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"Failed to store metrics batch: {e}")
-                raise
+        try:
+            stmt = insert(MetricRecord).returning(MetricRecord.id)
+            async with self.engine.begin() as conn:
+                result = await conn.execute(stmt, [_encode_metric(m) for m in metrics_data])
+                return list(result.scalars())
+        except Exception as e:
+            logger.error(f"Failed to store metrics batch: {e}")
+            raise
 
-    async def get_metrics(self,
-                         job_id: Optional[int] = None,
-                         destination_id: Optional[int] = None,
-                         host: Optional[str] = None,
-                         metric_type: Optional[str] = None,
-                         start_time: Optional[datetime] = None,
-                         end_time: Optional[datetime] = None,
-                         limit: Optional[int] = None) -> List[MetricRecord]:
-        """Get metrics with filtering options"""
+    async def store_metrics_batch_fast(self, metrics_data: List[Dict[str, Any]]) -> int:
+        """Store multiple metric records without RETURNING, for pure inserts
+
+        Skips the Session entirely and runs executemany on the engine under
+        one transaction. Rows are grouped by key set so each group shares a
+        prepared statement.
+        """
         self._ensure_initialized()
 
-        async with self.async_session_maker() as session:
+        if not metrics_data:
+            return 0
+
+        rows = [_encode_metric(m) for m in metrics_data]
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        try:
+            async with self.engine.begin() as conn:
+                for group in groups.values():
+                    await conn.execute(_STMT_INSERT_METRIC, group)
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to store metrics batch: {e}")
+            raise
+
+    async def iter_metrics(self,
+                          job_id: Optional[int] = None,
+                          destination_id: Optional[int] = None,
+                          host: Optional[str] = None,
+                          metric_type: Optional[str] = None,
+                          start_time: Optional[datetime] = None,
+                          end_time: Optional[datetime] = None,
+                          limit: Optional[int] = None,
+                          before: Optional[Tuple[datetime, int]] = None,
+                          with_additional_data: bool = False) -> AsyncIterator[Any]:
+        """Stream metric rows with filtering options without materializing the result set
+
+        Yields Core Row tuples (see METRIC_COLS) rather than ORM instances;
+        rows support attribute access and ._asdict() for serialization.
+
+        Pagination is keyset-based: pass the (timestamp, id) of the last row
+        of the previous page as `before` to get the next page in O(1) instead
+        of walking discarded OFFSET rows.
+        """
+        self._ensure_initialized()
+
+        cols = METRIC_COLS
+        if with_additional_data:
+            cols = METRIC_COLS + (_metric_table.c.additional_data,)
+
+        # Pure Core read — a raw connection avoids per-call Session setup
+        async with self.engine.connect() as conn:
             try:
-                query = select(MetricRecord)
+                query = select(*cols)
 
                 # Apply filters
                 if job_id:
@@ -398,46 +967,456 @@ class Database:
                 if host:
                     query = query.where(MetricRecord.host == host)
                 if metric_type:
-                    query = query.where(MetricRecord.metric_type == metric_type)
+                    query = query.where(
+                        MetricRecord.metric_type == METRIC_TYPE_CODES.get(metric_type, -1)
+                    )
                 if start_time:
                     query = query.where(MetricRecord.timestamp >= start_time)
                 if end_time:
                     query = query.where(MetricRecord.timestamp <= end_time)
-
-                # Order by timestamp descending
-                query = query.order_by(MetricRecord.timestamp.desc())
+                if before:
+                    # Keyset cursor: strictly before the last row already seen
+                    query = query.where(
+                        tuple_(MetricRecord.timestamp, MetricRecord.id) < before
+                    )
+
+                # Order newest-first with id as tiebreaker so the cursor is stable
+                query = query.order_by(
+                    MetricRecord.timestamp.desc(), MetricRecord.id.desc()
+                )
 
                 # Apply limit
                 if limit:
                     query = query.limit(limit)
 
-                result = await session.execute(query)
-                return result.scalars().all()
+                # Stream rows in server-side batches so memory stays bounded
+                result = await conn.stream(query.execution_options(yield_per=1000))
+                async for row in result:
+                    yield row
             except Exception as e:
                 logger.error(f"Failed to get metrics: {e}")
                 raise
 
-    async def create_job_run(self, job_id: int, total_destinations: int) -> int:
-        """Create a new job run record"""
+    async def get_metrics(self,
+                         job_id: Optional[int] = None,
+                         destination_id: Optional[int] = None,
+                         host: Optional[str] = None,
+                         metric_type: Optional[str] = None,
+                         start_time: Optional[datetime] = None,
+                         end_time: Optional[datetime] = None,
+                         limit: Optional[int] = None,
+                         before: Optional[Tuple[datetime, int]] = None) -> List[Any]:
+        """Get metric rows with filtering options (list-materializing wrapper around iter_metrics)
+
+        The (row.timestamp, row.id) of the last returned row can be passed
+        back as `before` to fetch the next page without an OFFSET scan.
+        """
+        return [metric async for metric in self.iter_metrics(
+            job_id=job_id,
+            destination_id=destination_id,
+            host=host,
+            metric_type=metric_type,
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit,
+            before=before
+        )]
+
+    async def get_metrics_raw(self,
+                             job_id: Optional[int] = None,
+                             destination_id: Optional[int] = None,
+                             host: Optional[str] = None,
+                             metric_type: Optional[str] = None,
+                             start_time: Optional[datetime] = None,
+                             end_time: Optional[datetime] = None,
+                             limit: Optional[int] = None,
+                             before: Optional[Tuple[datetime, int]] = None,
+                             with_additional_data: bool = False) -> List[MetricRow]:
+        """Get metric rows as slotted MetricRow instances
+
+        Preferred for internal bulk consumers: rows are built positionally
+        from the streamed Core result, so there is no ORM instantiation and
+        no per-row __dict__ allocation.
+        """
+        return [MetricRow(*row) async for row in self.iter_metrics(
+            job_id=job_id,
+            destination_id=destination_id,
+            host=host,
+            metric_type=metric_type,
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit,
+            before=before,
+            with_additional_data=with_additional_data
+        )]
+
+    async def get_destination_stats(self,
+                                    destination_id: int,
+                                    limit: int = 100,
+                                    recent_window: int = 20) -> Tuple[int, int, Optional[float], int, Optional[datetime]]:
+        """Aggregate recent metric statistics for a destination in SQL
+
+        Computes over the newest `limit` rows: total checks, successful
+        checks, average ping response time of successful pings, failures
+        within the newest `recent_window` rows, and the latest check
+        timestamp. SQLite does the aggregation and returns one row of
+        scalars instead of hydrating ORM objects per metric.
+
+        Returns:
+            (total_checks, successful_checks, avg_response_time,
+             recent_failures, last_check)
+        """
         self._ensure_initialized()
 
-        async with self.async_session_maker() as session:
+        async with self.engine.connect() as conn:
             try:
-                run_data = {
-                    'job_id': job_id,
-                    'start_time': datetime.now(timezone.utc),
-                    'total_destinations': total_destinations,
-                    'status': 'running'
-                }
-                stmt = insert(JobRun).values(**run_data).return_values(JobRun.id)
-                result = await session.execute(stmt)
-                await session.commit()
-                return result.scalar_one()
+                window = (
+                    select(
+                        _metric_table.c.timestamp,
+                        _metric_table.c.status,
+                        _metric_table.c.metric_type,
+                        _metric_table.c.response_time_ms
+                    )
+                    .where(_metric_table.c.destination_id == destination_id)
+                    .order_by(_metric_table.c.timestamp.desc())
+                    .limit(limit)
+                    .subquery()
+                )
+                success = STATUS_CODES['success']
+                stmt = select(
+                    func.count(),
+                    func.coalesce(func.sum(case((window.c.status == success, 1), else_=0)), 0),
+                    func.avg(case((and_(window.c.metric_type == METRIC_TYPE_CODES['ping'],
+                                        window.c.status == success),
+                                   window.c.response_time_ms))),
+                    func.max(window.c.timestamp)
+                ).select_from(window)
+                total, successful, avg_response, last_check = (await conn.execute(stmt)).one()
+
+                # Count failures newer than the recent_window-th check; the
+                # status filter lets SQLite answer from the small partial
+                # failure index instead of scanning recent rows
+                cutoff = (
+                    select(func.min(
+                        select(_metric_table.c.timestamp)
+                        .where(_metric_table.c.destination_id == destination_id)
+                        .order_by(_metric_table.c.timestamp.desc())
+                        .limit(recent_window)
+                        .subquery().c.timestamp
+                    ))
+                    .scalar_subquery()
+                )
+                failures_stmt = (
+                    select(func.count())
+                    .select_from(_metric_table)
+                    .where(and_(
+                        _metric_table.c.destination_id == destination_id,
+                        _metric_table.c.status != success,
+                        _metric_table.c.timestamp >= cutoff
+                    ))
+                )
+                recent_failures = (await conn.execute(failures_stmt)).scalar_one()
+
+                return total, successful, avg_response, recent_failures, last_check
             except Exception as e:
-                await session.rollback()
-                logger.error(f"Failed to create job run: {e}")
+                logger.error(f"Failed to get destination stats: {e}")
                 raise
 
+    # Monthly metric shards
+    #
+    # Metrics older than the hot window can be moved into per-month SQLite
+    # files (metrics_YYYYMM.db) attached via ATTACH DATABASE. The engine uses
+    # a StaticPool (a single shared connection), so an ATTACH stays in effect
+    # for the life of the pool. Reads over archived ranges only touch the
+    # shard files whose month intersects the requested time range, so the
+    # per-shard pruning acts like partition-level predicate pushdown.
+
+    @staticmethod
+    def _month_start(ts: datetime) -> datetime:
+        """Truncate a timestamp to the start of its month"""
+        return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _next_month(ts: datetime) -> datetime:
+        """Start of the month following a timestamp's month"""
+        return (ts.replace(day=28) + timedelta(days=4)).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+
+    def _shard_alias(self, ts: datetime) -> str:
+        """Schema alias of the monthly shard covering a timestamp"""
+        return f"m{ts.year:04d}{ts.month:02d}"
+
+    def _shard_path(self, alias: str) -> Path:
+        """Filesystem path of a monthly shard database"""
+        base = self.database_url.split("///", 1)[-1]
+        return Path(base).parent / f"metrics_{alias[1:]}.db"
+
+    def _shards_for_range(self,
+                          start_time: datetime,
+                          end_time: datetime) -> List[str]:
+        """Aliases of existing shards whose month intersects [start_time, end_time]"""
+        aliases = []
+        month = self._month_start(start_time)
+        while month <= end_time:
+            alias = self._shard_alias(month)
+            if self._shard_path(alias).exists():
+                aliases.append(alias)
+            month = self._next_month(month)
+        return aliases
+
+    async def _ensure_shard(self, alias: str):
+        """Attach a monthly shard database, creating its metrics table if absent"""
+        async with self.engine.connect() as conn:
+            attached = await conn.execute(text("PRAGMA database_list"))
+            if alias not in {row[1] for row in attached}:
+                await conn.execute(
+                    text(f"ATTACH DATABASE '{self._shard_path(alias)}' AS {alias}")
+                )
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {alias}.metrics AS "
+                f"SELECT * FROM main.metrics WHERE 0"
+            ))
+            await conn.commit()
+
+    async def rollup_to_shards(self, older_than: datetime) -> int:
+        """
+        Move metrics older than a cutoff into monthly shard databases
+
+        Each affected month is moved in one INSERT..SELECT plus DELETE inside
+        a single transaction, so the hot metrics table (and its six B-trees)
+        stays bounded to the recent window. Archived months remain queryable
+        through iter_archived_metrics.
+
+        Args:
+            older_than: Move rows with timestamp before this cutoff
+
+        Returns:
+            Number of rows moved
+        """
+        self._ensure_initialized()
+
+        async with self.async_session_maker() as session:
+            result = await session.execute(
+                select(func.min(MetricRecord.timestamp))
+                .where(MetricRecord.timestamp < older_than)
+            )
+            oldest = result.scalar_one_or_none()
+
+        if not oldest:
+            return 0
+
+        moved = 0
+        month = self._month_start(oldest)
+        while month < older_than:
+            upper = min(self._next_month(month), older_than)
+            alias = self._shard_alias(month)
+            await self._ensure_shard(alias)
+
+            params = {'lo': _to_epoch_us(month), 'hi': _to_epoch_us(upper)}
+            async with self.engine.begin() as conn:
+                result = await conn.execute(text(
+                    f"INSERT INTO {alias}.metrics "
+                    f"SELECT * FROM main.metrics "
+                    f"WHERE timestamp >= :lo AND timestamp < :hi"
+                ), params)
+                await conn.execute(text(
+                    "DELETE FROM main.metrics "
+                    "WHERE timestamp >= :lo AND timestamp < :hi"
+                ), params)
+                moved += result.rowcount
+
+            month = self._next_month(month)
+
+        logger.info(f"Moved {moved} metrics older than {older_than} into monthly shards")
+        return moved
+
+    async def iter_archived_metrics(self,
+                                   start_time: datetime,
+                                   end_time: datetime,
+                                   job_id: Optional[int] = None,
+                                   destination_id: Optional[int] = None,
+                                   host: Optional[str] = None,
+                                   metric_type: Optional[str] = None) -> AsyncIterator[Any]:
+        """Stream archived metric rows from the monthly shards covering a time range
+
+        Only shards whose month intersects [start_time, end_time] are opened;
+        rows are yielded newest-first to match iter_metrics ordering.
+        """
+        self._ensure_initialized()
+
+        filters = ["timestamp >= :start_time", "timestamp <= :end_time"]
+        params: Dict[str, Any] = {
+            'start_time': _to_epoch_us(start_time),
+            'end_time': _to_epoch_us(end_time),
+        }
+        if metric_type is not None:
+            metric_type = METRIC_TYPE_CODES.get(metric_type, -1)
+        for name, value in (('job_id', job_id), ('destination_id', destination_id),
+                            ('host', host), ('metric_type', metric_type)):
+            if value is not None:
+                filters.append(f"{name} = :{name}")
+                params[name] = value
+
+        for alias in reversed(self._shards_for_range(start_time, end_time)):
+            await self._ensure_shard(alias)
+            query = text(
+                f"SELECT id, timestamp, job_id, destination_id, host, "
+                f"{_decode_case_sql('metric_type', METRIC_TYPE_NAMES)}, "
+                f"{_decode_case_sql('status', STATUS_NAMES)}, response_time_ms "
+                f"FROM {alias}.metrics WHERE {' AND '.join(filters)} "
+                f"ORDER BY timestamp DESC"
+            ).columns(
+                _metric_table.c.id,
+                _metric_table.c.timestamp,
+                _metric_table.c.job_id,
+                _metric_table.c.destination_id,
+                _metric_table.c.host,
+                column('metric_type', String),
+                column('status', String),
+                _metric_table.c.response_time_ms,
+            )
+
+            async with self.async_session_maker() as session:
+                result = await session.stream(query, params)
+                async for row in result:
+                    yield row
+
+    async def rollup_to_parquet(self, older_than: datetime, out_dir: Path) -> int:
+        """
+        Archive metrics older than a cutoff to partitioned Parquet files
+
+        Rows are streamed out of SQLite ordered by (job_id, timestamp), written
+        to out_dir/job_id=<id>/date=<YYYY-MM-DD>/part.parquet with Snappy
+        compression and dictionary encoding (host/metric_type/status compress
+        very well), then deleted so SQLite keeps only the hot recent window.
+        Analytics queries over the archive can go through pyarrow/duckdb.
+
+        Args:
+            older_than: Archive rows with timestamp before this cutoff
+            out_dir: Root directory for the partitioned Parquet output
+
+        Returns:
+            Number of rows archived
+        """
+        self._ensure_initialized()
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError(
+                "pyarrow is required for Parquet rollup — "
+                "install with the 'archive' extra"
+            )
+
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('timestamp', pa.timestamp('us', tz='UTC')),
+            ('job_id', pa.int64()),
+            ('destination_id', pa.int64()),
+            ('host', pa.string()),
+            ('metric_type', pa.string()),
+            ('status', pa.string()),
+            ('response_time_ms', pa.float64()),
+            ('additional_data', pa.string()),
+            ('created_at', pa.timestamp('us', tz='UTC')),
+        ])
+        batch_size = 65536
+        archived = 0
+        writers: Dict[Path, Any] = {}
+
+        def _write_batch(partition: Path, columns: Dict[str, list]):
+            writer = writers.get(partition)
+            if writer is None:
+                partition.mkdir(parents=True, exist_ok=True)
+                writer = pq.ParquetWriter(
+                    partition / "part.parquet", schema,
+                    compression='snappy', use_dictionary=True
+                )
+                writers[partition] = writer
+            writer.write_batch(pa.record_batch(
+                [columns[name] for name in schema.names], schema=schema
+            ))
+
+        try:
+            async with self.async_session_maker() as session:
+                query = (
+                    select(MetricRecord)
+                    .where(MetricRecord.timestamp < older_than)
+                    .order_by(MetricRecord.job_id, MetricRecord.timestamp)
+                    .execution_options(yield_per=batch_size)
+                )
+                result = await session.stream(query)
+
+                current_partition = None
+                columns = {name: [] for name in schema.names}
+
+                async for metric in result.scalars():
+                    partition = (
+                        Path(out_dir)
+                        / f"job_id={metric.job_id}"
+                        / f"date={metric.timestamp.date().isoformat()}"
+                    )
+                    if partition != current_partition or len(columns['id']) >= batch_size:
+                        if current_partition is not None and columns['id']:
+                            _write_batch(current_partition, columns)
+                            columns = {name: [] for name in schema.names}
+                        current_partition = partition
+
+                    for name in schema.names:
+                        value = getattr(metric, name)
+                        # ORM rows carry the integer codes; archive the names
+                        if name == 'status':
+                            value = STATUS_NAMES.get(value, value)
+                        elif name == 'metric_type':
+                            value = METRIC_TYPE_NAMES.get(value, value)
+                        columns[name].append(value)
+                    archived += 1
+
+                if current_partition is not None and columns['id']:
+                    _write_batch(current_partition, columns)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        if archived:
+            # Archived rows are on disk; drop them from the hot table
+            async with self.async_session_maker() as session:
+                try:
+                    await session.execute(
+                        delete(MetricRecord).where(MetricRecord.timestamp < older_than)
+                    )
+                    await session.commit()
+                    await session.execute(text("PRAGMA incremental_vacuum"))
+                except Exception as e:
+                    await session.rollback()
+                    logger.error(f"Failed to delete archived metrics: {e}")
+                    raise
+
+        logger.info(f"Archived {archived} metrics older than {older_than} to {out_dir}")
+        return archived
+
+    async def create_job_run(self, job_id: int, total_destinations: int) -> int:
+        """Create a new job run record"""
+        self._ensure_initialized()
+
+        try:
+            # Plain Core insert — engine.begin() skips Session bookkeeping
+            run_data = {
+                'job_id': job_id,
+                'start_time': datetime.now(timezone.utc),
+                'total_destinations': total_destinations,
+                'status': 'running'
+            }
+            stmt = insert(JobRun).values(**run_data).returning(JobRun.id)
+            async with self.engine.begin() as conn:
+                result = await conn.execute(stmt)
+                return result.scalar_one()
+        except Exception as e:
+            logger.error(f"Failed to create job run: {e}")
+            raise
+
     async def update_job_run(self,
                            run_id: int,
                            status: str,
@@ -447,33 +1426,36 @@ class Database:
         """Update job run status"""
         self._ensure_initialized()
 
-        async with self.async_session_maker() as session:
-            try:
-                update_data = {
-                    'status': status,
-                    'end_time': datetime.now(timezone.utc)
-                }
-
-                if successful_destinations is not None:
-                    update_data['successful_destinations'] = successful_destinations
-                if failed_destinations is not None:
-                    update_data['failed_destinations'] = failed_destinations
-                if error_message:
-                    update_data['error_message'] = error_message
-
-                stmt = update(JobRun).where(JobRun.id == run_id).values(**update_data)
-                result = await session.execute(stmt)
-                await session.commit()
+        try:
+            update_data = {
+                'status': status,
+                'end_time': datetime.now(timezone.utc)
+            }
+
+            if successful_destinations is not None:
+                update_data['successful_destinations'] = successful_destinations
+            if failed_destinations is not None:
+                update_data['failed_destinations'] = failed_destinations
+            if error_message:
+                update_data['error_message'] = error_message
+
+            stmt = update(JobRun).where(JobRun.id == run_id).values(**update_data)
+            async with self.engine.begin() as conn:
+                result = await conn.execute(stmt)
                 return result.rowcount > 0
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"Failed to update job run: {e}")
-                raise
+        except Exception as e:
+            logger.error(f"Failed to update job run: {e}")
+            raise
 
     async def get_job_runs(self,
                           job_id: Optional[int] = None,
-                          limit: int = 100) -> List[JobRun]:
-        """Get job runs with filtering"""
+                          limit: int = 100,
+                          before: Optional[Tuple[datetime, int]] = None) -> List[JobRun]:
+        """Get job runs with filtering
+
+        Pass the (start_time, id) of the last returned run as `before` to
+        page through history keyset-style instead of via OFFSET.
+        """
         self._ensure_initialized()
 
         async with self.async_session_maker() as session:
@@ -482,8 +1464,14 @@ class Database:
 
                 if job_id:
                     query = query.where(JobRun.job_id == job_id)
-
-                query = query.order_by(JobRun.start_time.desc()).limit(limit)
+                if before:
+                    query = query.where(
+                        tuple_(JobRun.start_time, JobRun.id) < before
+                    )
+
+                query = query.order_by(
+                    JobRun.start_time.desc(), JobRun.id.desc()
+                ).limit(limit)
 
                 result = await session.execute(query)
                 return result.scalars().all()
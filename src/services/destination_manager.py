@@ -5,8 +5,13 @@ Provides business logic for managing global destinations including CRUD operatio
 health monitoring, and validation.
 """
 
+import ast
 import asyncio
+import hashlib
+import ipaddress
+import json
 import logging
+import re
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 
@@ -16,6 +21,37 @@ from src.collectors.ping_collector import PingCollector
 
 logger = logging.getLogger(__name__)
 
+# RFC 1123 hostname: dot-separated labels of at most 63 alphanumeric/hyphen
+# characters, 253 characters overall. Compiled once at import.
+_HOST_RE = re.compile(
+    r'^(?=.{1,253}$)'
+    r'(?:(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)\.)*'
+    r'[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?$'
+)
+
+def _config_hash(dest_config: DestinationConfig) -> str:
+    """Short digest of a destination's config fields, for no-op detection"""
+    payload = repr((dest_config.host, dest_config.display_name,
+                    dest_config.description, tuple(dest_config.tags),
+                    dest_config.status))
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+def _parse_tags(raw: Optional[str]) -> List[str]:
+    """Parse a stored tags column into a list
+
+    Tags are stored as JSON; rows written before the JSON switch used
+    str(list) and fall back to a literal_eval parse.
+    """
+    if not raw:
+        return []
+    try:
+        return json.loads(raw)
+    except ValueError:
+        try:
+            return ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            return []
+
 class DestinationManager:
     """Service for managing global destinations"""
 
@@ -31,6 +67,12 @@ class DestinationManager:
         self.db = database
         self.ping_collector = PingCollector()
         self._monitoring_task: Optional[asyncio.Task] = None
+        # Parsed config destinations, keyed by name; invalidated on CRUD
+        self._config_dest_map: Optional[Dict[str, DestinationConfig]] = None
+        # Health-probe updates are queued and written by a dedicated task so
+        # fsync/checkpoint latency never stalls the probing path
+        self._write_queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Initialize the destination manager"""
@@ -39,7 +81,8 @@ class DestinationManager:
         # Sync configuration with database
         await self._sync_config_with_database()
 
-        # Start health monitoring
+        # Start the batching writer, then health monitoring
+        self._writer_task = asyncio.create_task(self._writer_loop())
         await self._start_health_monitoring()
 
     async def cleanup(self):
@@ -50,68 +93,63 @@ class DestinationManager:
                 await self._monitoring_task
             except asyncio.CancelledError:
                 pass
+
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+
+        # Flush any updates still queued at shutdown; a database error here
+        # must not abort the rest of the application teardown
+        leftovers = []
+        while not self._write_queue.empty():
+            leftovers.append(self._write_queue.get_nowait())
+        if leftovers:
+            try:
+                await self.db.bulk_update_destinations(leftovers)
+            except Exception as e:
+                logger.error(f"Failed to flush destination updates at shutdown: {e}")
+
         logger.info("Destination Manager cleaned up")
 
+    def _config_destinations(self) -> Dict[str, DestinationConfig]:
+        """Get the config destination map, re-parsing only after a CRUD change"""
+        if self._config_dest_map is None:
+            self._config_dest_map = self.config.get_all_destinations()
+        return self._config_dest_map
+
     async def _sync_config_with_database(self):
         """Synchronize configuration destinations with database"""
         try:
-            # Get destinations from config
-            config_destinations = self.config.get_all_destinations()
+            config_destinations = self._config_destinations()
+            if not config_destinations:
+                return
 
-            # Get destinations from database
-            db_destinations = await self.db.get_destinations(active_only=False)
-            db_dest_map = {dest.name: dest for dest in db_destinations}
+            # One multi-row UPSERT reconciles the whole config server-side;
+            # no Python diff and no per-destination round trips
+            rows = [self._dest_config_to_row(dc) for dc in config_destinations.values()]
+            await self.db.upsert_destinations(rows)
 
-            # Add missing destinations to database
-            for name, dest_config in config_destinations.items():
-                if name not in db_dest_map:
-                    await self._create_destination_in_db(dest_config)
-                    logger.info(f"Added destination '{name}' to database from config")
-
-            # Update database destinations with config changes
-            for dest in db_destinations:
-                if dest.name in config_destinations:
-                    config_dest = config_destinations[dest.name]
-                    if self._destination_changed(dest, config_dest):
-                        await self._update_destination_in_db(dest.id, config_dest)
-                        logger.info(f"Updated destination '{dest.name}' in database from config")
-
-            logger.info(f"Database synchronized with {len(config_destinations)} destinations")
+            logger.info(f"Database synchronized with {len(rows)} destinations")
 
         except Exception as e:
             logger.error(f"Failed to sync config with database: {e}")
 
-    def _destination_changed(self, db_dest: Destination, config_dest: DestinationConfig) -> bool:
-        """Check if destination configuration has changed"""
-        return (
-            db_dest.host != config_dest.host or
-            db_dest.display_name != config_dest.display_name or
-            db_dest.description != config_dest.description or
-            db_dest.status != config_dest.status
-        )
-
-    async def _create_destination_in_db(self, dest_config: DestinationConfig) -> int:
-        """Create destination in database from config"""
-        dest_data = {
-            'name': dest_config.name,
+    def _dest_config_to_row(self, dest_config: DestinationConfig, include_name: bool = True) -> Dict[str, Any]:
+        """Convert a config destination into a database row dict"""
+        row = {
             'host': dest_config.host,
             'display_name': dest_config.display_name,
             'description': dest_config.description,
-            'tags': str(dest_config.tags),  # Convert to string for JSON storage
-            'status': dest_config.status
+            'tags': json.dumps(dest_config.tags),  # JSON so SQL can filter via json_each
+            'status': dest_config.status,
+            'config_hash': _config_hash(dest_config)
         }
-        return await self.db.create_destination(dest_data)
-
-    async def _update_destination_in_db(self, dest_id: int, dest_config: DestinationConfig):
-        """Update destination in database from config"""
-        update_data = {
-            'host': dest_config.host,
-            'display_name': dest_config.display_name,
-            'description': dest_config.description,
-            'tags': str(dest_config.tags),  # Convert to string for JSON storage
-            'status': dest_config.status
-        }
-        await self.db.update_destination(dest_id, update_data)
+        if include_name:
+            row['name'] = dest_config.name
+        return row
 
     async def _start_health_monitoring(self):
         """Start background health monitoring"""
@@ -130,32 +168,73 @@ class DestinationManager:
                 await asyncio.sleep(60)  # Wait 1 minute on error
 
     async def _check_destination_health(self):
-        """Check health of all active destinations"""
+        """Check health of all active destinations concurrently"""
         try:
             active_destinations = await self.db.get_destinations(active_only=True)
+            if not active_destinations:
+                return
+
+            # Fan out the pings so a sweep takes max(rtt) instead of sum(rtt);
+            # the semaphore bounds concurrent ping subprocesses
+            semaphore = asyncio.Semaphore(32)
 
-            for dest in active_destinations:
-                try:
-                    # Perform ping test
-                    result = await self.ping_collector.ping_async(dest.host)
-
-                    # Update last_seen if successful
-                    if result['success']:
-                        await self.db.update_destination(dest.id, {
-                            'last_seen': datetime.now(timezone.utc),
-                            'status': 'active'
-                        })
-                    else:
-                        logger.warning(f"Ping failed for destination '{dest.name}': {result.get('error', 'Unknown error')}")
-
-                except Exception as e:
-                    logger.error(f"Error checking health for destination '{dest.name}': {e}")
-                    # Mark as error if multiple consecutive failures
-                    # This logic could be enhanced with failure counting
+            async def _probe(dest):
+                async with semaphore:
+                    return dest, await self.ping_collector.ping_async(dest.host)
+
+            results = await asyncio.gather(
+                *(_probe(dest) for dest in active_destinations),
+                return_exceptions=True
+            )
+
+            # Collect reachable destinations and write them in one transaction
+            now = datetime.now(timezone.utc)
+            updates = []
+            for item in results:
+                if isinstance(item, Exception):
+                    logger.error(f"Error checking destination health: {item}")
+                    continue
+
+                dest, result = item
+                if result['success']:
+                    updates.append({'id': dest.id, 'last_seen': now, 'status': 'active'})
+                else:
+                    logger.warning(f"Ping failed for destination '{dest.name}': {result.get('error', 'Unknown error')}")
+
+            for update in updates:
+                self._write_queue.put_nowait(update)
 
         except Exception as e:
             logger.error(f"Error in destination health check: {e}")
 
+    async def _writer_loop(self):
+        """Drain queued destination updates and write them in batches
+
+        Collects up to 100 updates or 200 ms worth per flush and issues one
+        executemany UPDATE in a single transaction, followed by a PASSIVE
+        WAL checkpoint — both isolated from probe and request handling.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                batch = [await self._write_queue.get()]
+                deadline = loop.time() + 0.2
+                while len(batch) < 100:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._write_queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self.db.bulk_update_destinations(batch)
+                await self.db.checkpoint('PASSIVE')
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error writing destination updates: {e}")
+
     # Destination CRUD Operations
     async def create_destination(self, destination: DestinationConfig) -> int:
         """
@@ -182,7 +261,7 @@ class DestinationManager:
             'host': destination.host,
             'display_name': destination.display_name,
             'description': destination.description,
-            'tags': str(destination.tags),
+            'tags': json.dumps(destination.tags),
             'status': destination.status
         }
 
@@ -191,6 +270,7 @@ class DestinationManager:
         # Add to configuration
         if self.config.add_destination(destination):
             await self.config.save_config()
+        self._config_dest_map = None
 
         logger.info(f"Created destination '{destination.name}' with ID {dest_id}")
         return dest_id
@@ -228,12 +308,8 @@ class DestinationManager:
         return self._destination_to_dict(dest)
 
     async def _get_destination_by_name(self, name: str) -> Optional[Destination]:
-        """Get destination by name from database"""
-        all_dests = await self.db.get_destinations(active_only=False)
-        for dest in all_dests:
-            if dest.name == name:
-                return dest
-        return None
+        """Get destination by name from database (indexed unique-name lookup)"""
+        return await self.db.get_destination_by_name(name)
 
     async def get_all_destinations(self, active_only: bool = True) -> List[Dict[str, Any]]:
         """
@@ -279,7 +355,7 @@ class DestinationManager:
             update_data['description'] = updates.get('description')
 
         if 'tags' in updates:
-            update_data['tags'] = str(updates['tags'])
+            update_data['tags'] = json.dumps(updates['tags'])
 
         if 'status' in updates:
             if updates['status'] not in ['active', 'inactive', 'error']:
@@ -290,19 +366,20 @@ class DestinationManager:
         success = await self.db.update_destination(dest_id, update_data)
 
         if success:
-            # Update in configuration
-            updated_dest = await self.db.get_destination(dest_id)
+            # Compose the new config from values already in hand instead of
+            # re-fetching the row we just wrote
             dest_config = DestinationConfig(
-                name=updated_dest.name,
-                host=updated_dest.host,
-                display_name=updated_dest.display_name,
-                description=updated_dest.description,
-                tags=eval(updated_dest.tags) if updated_dest.tags else [],
-                status=updated_dest.status
+                name=existing.name,
+                host=update_data.get('host', existing.host),
+                display_name=update_data.get('display_name', existing.display_name),
+                description=update_data.get('description', existing.description),
+                tags=updates['tags'] if 'tags' in updates else _parse_tags(existing.tags),
+                status=update_data.get('status', existing.status)
             )
 
             if self.config.update_destination(existing.name, dest_config):
                 await self.config.save_config()
+            self._config_dest_map = None
 
             logger.info(f"Updated destination '{existing.name}'")
 
@@ -340,6 +417,7 @@ class DestinationManager:
             # Remove from configuration
             self.config.remove_destination(dest.name)
             await self.config.save_config()
+            self._config_dest_map = None
 
             logger.info(f"Deleted destination '{dest.name}'")
 
@@ -359,31 +437,20 @@ class DestinationManager:
         if not dest:
             raise ValueError(f"Destination with ID {dest_id} not found")
 
-        # Get recent metrics for this destination
-        recent_metrics = await self.db.get_metrics(
-            destination_id=dest_id,
-            limit=100
-        )
+        # Aggregate recent metrics in SQL — one row of scalars instead of
+        # hydrating 100 metric objects
+        (total_checks, successful_checks, avg_response_time,
+         recent_failures, last_check) = await self.db.get_destination_stats(dest_id, limit=100)
 
-        # Calculate statistics
-        total_checks = len(recent_metrics)
-        successful_checks = len([m for m in recent_metrics if m.status == 'success'])
         success_rate = (successful_checks / total_checks * 100) if total_checks > 0 else 0
 
-        # Calculate average response time for successful pings
-        ping_metrics = [m for m in recent_metrics if m.metric_type == 'ping' and m.status == 'success']
-        avg_response_time = sum(m.response_time_ms for m in ping_metrics) / len(ping_metrics) if ping_metrics else None
-
-        # Count recent failures
-        recent_failures = len([m for m in recent_metrics[:20] if m.status != 'success'])
-
         return {
             'id': dest.id,
             'name': dest.name,
             'host': dest.host,
             'status': dest.status,
             'last_seen': dest.last_seen.isoformat() if dest.last_seen else None,
-            'last_check': recent_metrics[0].timestamp.isoformat() if recent_metrics else None,
+            'last_check': last_check.isoformat() if last_check else None,
             'last_ping': avg_response_time,
             'success_rate': round(success_rate, 2),
             'total_checks': total_checks,
@@ -402,44 +469,36 @@ class DestinationManager:
         Returns:
             List of matching destinations
         """
-        destinations = await self.db.get_destinations(active_only=False)
-
-        # Apply filters
-        if filters:
-            if 'status' in filters:
-                destinations = [d for d in destinations if d.status == filters['status']]
-            if 'tags' in filters:
-                required_tags = set(filters['tags'])
-                destinations = [
-                    d for d in destinations
-                    if required_tags.issubset(set(eval(d.tags) if d.tags else []))
-                ]
-
-        # Apply search query
-        if query:
-            query = query.lower()
-            matching_dests = []
-            for dest in destinations:
-                if (query in dest.name.lower() or
-                    query in dest.display_name.lower() or
-                    query in dest.host.lower() or
-                    (dest.description and query in dest.description.lower())):
-                    matching_dests.append(dest)
-            destinations = matching_dests
+        filters = filters or {}
+
+        # All filtering (status, tag membership, substring match) happens in
+        # SQL so only matching rows cross into Python
+        destinations = await self.db.search_destinations(
+            query=query,
+            status=filters.get('status'),
+            tags=filters.get('tags')
+        )
 
         return [self._destination_to_dict(dest) for dest in destinations]
 
     def _validate_host(self, host: str) -> bool:
-        """Validate host format (basic validation)"""
-        if not host or len(host.strip()) == 0:
+        """Validate that host is an IP address or RFC 1123 hostname
+
+        Rejecting malformed hosts here avoids a database round-trip and a
+        doomed ping later; both checks are single C-level calls.
+        """
+        if not host:
             return False
 
-        # Basic validation - can be enhanced with regex
         host = host.strip()
 
-        # Check for valid hostname or IP format
-        # This is a basic check - can be enhanced
-        return len(host) > 0 and not host.isspace()
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            pass
+
+        return _HOST_RE.fullmatch(host) is not None
 
     def _destination_to_dict(self, dest: Destination) -> Dict[str, Any]:
         """Convert destination object to dictionary"""
@@ -449,7 +508,7 @@ class DestinationManager:
             'host': dest.host,
             'display_name': dest.display_name,
             'description': dest.description,
-            'tags': eval(dest.tags) if dest.tags else [],
+            'tags': _parse_tags(dest.tags),
             'status': dest.status,
             'created_at': dest.created_at.isoformat(),
             'updated_at': dest.updated_at.isoformat(),
@@ -7,14 +7,16 @@ Coordinates with collectors and manages metric collection workflows.
 
 import asyncio
 import logging
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Set
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Callable, Dict, List, Optional, Set
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, and_
 
 from src.core.database import Database, Job, JobRun, MetricRecord, Destination
 from src.core.config import JobConfig, DestinationConfig
 from src.collectors.ping_collector import PingCollector
+from src.services import _metrics
 from src.services.destination_manager import DestinationManager
 
 logger = logging.getLogger(__name__)
@@ -25,14 +27,15 @@ class JobExecutionResult:
 
     def __init__(self, job_id: int, success: bool, metrics_collected: int = 0,
                  destinations_successful: int = 0, destinations_failed: int = 0,
-                 error_message: Optional[str] = None):
+                 error_message: Optional[str] = None,
+                 end_time: Optional[datetime] = None):
         self.job_id = job_id
         self.success = success
         self.metrics_collected = metrics_collected
         self.destinations_successful = destinations_successful
         self.destinations_failed = destinations_failed
         self.error_message = error_message
-        self.end_time = datetime.now(timezone.utc)
+        self.end_time = end_time or datetime.now(timezone.utc)
 
 
 class JobManager:
@@ -46,6 +49,24 @@ class JobManager:
     - Status tracking and reporting
     """
 
+    # Upper bound on concurrent per-destination collections within one run,
+    # so large jobs cannot exhaust file descriptors with ping subprocesses
+    MAX_PARALLEL_COLLECTIONS = 32
+
+    # How long a resolved host->id map stays valid; long enough that every
+    # run of a job reuses it, short enough to notice destination changes
+    RESOLVE_CACHE_TTL = 60.0
+
+    # Hard ceiling on one destination's collection, including subprocess
+    # spawn and parse. Bounds run latency at ceiling * ceil(N / parallel)
+    # even when a destination blackholes packets
+    COLLECT_TIMEOUT = 30.0
+
+    # Destinations gathered per slice before explicitly yielding to the
+    # loop, so one huge job cannot starve other scheduled tasks with the
+    # result-dict construction that runs between awaits
+    GATHER_CHUNK_SIZE = 64
+
     def __init__(self, db: Database, destination_manager: DestinationManager):
         """
         Initialize job manager
@@ -58,6 +79,14 @@ class JobManager:
         self.destination_manager = destination_manager
         self.ping_collector = PingCollector()
         self._running_jobs: Dict[int, asyncio.Task] = {}
+        self._dest_id_cache: Dict[tuple, tuple] = {}
+        # (enabled, next_run) per job, maintained on every state-changing
+        # write so status queries avoid a SELECT except on a cold miss
+        self._job_state: Dict[int, tuple] = {}
+        # Invoked with (job_id, enabled) whenever this manager writes the
+        # enabled flag; the scheduler registers here so its in-memory
+        # enabled set tracks disables it would otherwise never see
+        self.on_job_enabled_changed: Optional[Callable[[int, bool], None]] = None
         self._shutdown = False
 
     async def start_job(self, job_id: int, job_config: JobConfig) -> bool:
@@ -86,6 +115,12 @@ class JobManager:
                 self._execute_job(job_id, job_config, run_id)
             )
             self._running_jobs[job_id] = task
+            # The event loop removes the entry whenever the task finishes —
+            # completion, failure or cancellation — so no path can leak a
+            # stale "running" entry
+            task.add_done_callback(
+                lambda _task, job_id=job_id: self._running_jobs.pop(job_id, None)
+            )
 
             logger.info(f"Started job {job_id} (run {run_id})")
             return True
@@ -94,12 +129,15 @@ class JobManager:
             logger.error(f"Failed to start job {job_id}: {e}")
             return False
 
-    async def stop_job(self, job_id: int) -> bool:
+    async def stop_job(self, job_id: int, update_db: bool = True) -> bool:
         """
         Stop a running job
 
         Args:
             job_id: Job ID to stop
+            update_db: Persist the disabled state. Shutdown passes False —
+                the next boot re-reads job state from the database anyway,
+                so those writes would be pure overhead.
 
         Returns:
             True if job stopped successfully, False otherwise
@@ -118,11 +156,16 @@ class JobManager:
             except asyncio.CancelledError:
                 pass
 
-            # Remove from running jobs
-            del self._running_jobs[job_id]
+            # The done callback removes the entry; pop defensively in case
+            # the callback has not been dispatched yet
+            self._running_jobs.pop(job_id, None)
 
-            # Update job status in database
-            await self._update_job_status(job_id, False)
+            # Persist the disabled state only when the database does not
+            # already have it; the cached state makes that check free
+            if update_db:
+                cached = self._job_state.get(job_id)
+                if cached is None or cached[0]:
+                    await self._update_job_status(job_id, False)
 
             logger.info(f"Stopped job {job_id}")
             return True
@@ -142,29 +185,32 @@ class JobManager:
             Job status string or None if job not found
         """
         try:
-            async with self.db.async_session() as session:
-                result = await session.execute(
-                    select(Job.enabled, Job.last_run, Job.next_run)
-                    .where(Job.id == job_id)
-                )
-                row = result.first()
+            # Running is authoritative from the task dict — no DB involved
+            if job_id in self._running_jobs:
+                return "running"
+
+            state = self._job_state.get(job_id)
+            if state is None:
+                async with self.db.async_session() as session:
+                    result = await session.execute(
+                        select(Job.enabled, Job.next_run)
+                        .where(Job.id == job_id)
+                    )
+                    row = result.first()
 
                 if not row:
                     return None
 
-                is_enabled = row.enabled
-                is_running = job_id in self._running_jobs
-                last_run = row.last_run
-                next_run = row.next_run
-
-                if is_running:
-                    return "running"
-                elif is_enabled and next_run and next_run > datetime.now(timezone.utc):
-                    return "scheduled"
-                elif is_enabled:
-                    return "ready"
-                else:
-                    return "disabled"
+                state = (row.enabled, row.next_run)
+                self._job_state[job_id] = state
+
+            is_enabled, next_run = state
+            if is_enabled and next_run and next_run > datetime.now(timezone.utc):
+                return "scheduled"
+            elif is_enabled:
+                return "ready"
+            else:
+                return "disabled"
 
         except Exception as e:
             logger.error(f"Failed to get status for job {job_id}: {e}")
@@ -184,10 +230,11 @@ class JobManager:
         logger.info("Shutting down job manager...")
         self._shutdown = True
 
-        # Cancel all running jobs
+        # Cancel all running jobs without touching the database — state is
+        # re-read from it on the next boot regardless
         jobs_to_stop = list(self._running_jobs.keys())
         for job_id in jobs_to_stop:
-            await self.stop_job(job_id)
+            await self.stop_job(job_id, update_db=False)
 
         logger.info("Job manager shutdown complete")
 
@@ -200,42 +247,74 @@ class JobManager:
             job_config: Job configuration
             run_id: Job run ID
         """
+        # One timestamp for the whole run: every metric row stamps this, so
+        # rows of a run group exactly by time and the per-destination
+        # datetime.now() calls (and their tz lookups) disappear
         start_time = datetime.now(timezone.utc)
         metrics_collected = 0
         destinations_successful = 0
         destinations_failed = 0
         error_message = None
+        run_started_ns = time.perf_counter_ns()
 
         try:
             logger.info(f"Executing job {job_id} with {len(job_config.destinations)} destinations")
 
-            # Collect metrics for each destination
-            for destination_config in job_config.destinations:
-                try:
-                    # Get destination ID from host
-                    destination = await self.destination_manager.get_destination_by_host(destination_config.host)
-                    if not destination:
-                        logger.warning(f"Destination not found for host: {destination_config.host}")
-                        destinations_failed += 1
-                        continue
+            # Resolve all destination ids with one cached IN query instead
+            # of a round-trip per destination
+            hosts = [dest.host for dest in job_config.destinations]
+            host_ids = await self._resolve_destinations(hosts)
 
-                    destination_id = destination['id']
+            # Fan the collections out so the run costs max(latency) rather
+            # than sum(latency); the semaphore caps concurrent subprocesses
+            semaphore = asyncio.Semaphore(self.MAX_PARALLEL_COLLECTIONS)
 
-                    # Collect configured metrics
+            async def _collect_for(destination_config, destination_id):
+                async with semaphore:
+                    rows = []
                     for metric_type in job_config.metrics:
                         if metric_type == "ping":
-                            await self._collect_ping_metric(
-                                job_id, destination_id, destination_config, run_id
-                            )
-                            metrics_collected += 1
+                            rows.append(await self._collect_ping_metric(
+                                job_id, destination_id, destination_config, run_id,
+                                start_time
+                            ))
                         else:
                             logger.warning(f"Metric type '{metric_type}' not yet implemented")
+                    return rows
 
+            coros = []
+            for destination_config in job_config.destinations:
+                destination_id = host_ids.get(destination_config.host)
+                if destination_id is None:
+                    logger.warning(f"Destination not found for host: {destination_config.host}")
+                    destinations_failed += 1
+                    continue
+                coros.append(_collect_for(destination_config, destination_id))
+
+            # Gather in bounded slices with a yield point between them; the
+            # semaphore already caps subprocess concurrency, this caps how
+            # long the loop goes without servicing other tasks
+            results = []
+            for i in range(0, len(coros), self.GATHER_CHUNK_SIZE):
+                results.extend(await asyncio.gather(
+                    *coros[i:i + self.GATHER_CHUNK_SIZE], return_exceptions=True
+                ))
+                await asyncio.sleep(0)
+
+            # Collect the whole run's rows first, then store them with one
+            # executemany insert so the run costs a single commit/fsync
+            run_metrics = []
+            for item in results:
+                if isinstance(item, Exception):
+                    logger.error(f"Failed to collect metrics: {item}")
+                    destinations_failed += 1
+                else:
+                    run_metrics.extend(item)
                     destinations_successful += 1
 
-                except Exception as e:
-                    logger.error(f"Failed to collect metrics for {destination_config.host}: {e}")
-                    destinations_failed += 1
+            if run_metrics:
+                with _metrics.timed('metric.commit'):
+                    metrics_collected = await self.db.store_metrics_batch_fast(run_metrics)
 
             # Create execution result
             result = JobExecutionResult(
@@ -247,11 +326,8 @@ class JobManager:
                 error_message=error_message
             )
 
-            # Update job run record
-            await self._complete_job_run(run_id, result)
-
-            # Update job status and next run time
-            await self._update_job_after_run(job_id, job_config.interval, result)
+            # Close out the run and the job record in one transaction
+            await self._finalize_run(run_id, job_id, job_config.interval, result)
 
             logger.info(f"Job {job_id} completed: {metrics_collected} metrics collected")
 
@@ -269,77 +345,122 @@ class JobManager:
                 error_message=error_message
             )
 
-            await self._complete_job_run(run_id, result)
+            await self._finalize_run(run_id, job_id, job_config.interval, result)
 
         finally:
-            # Remove from running jobs
-            if job_id in self._running_jobs:
-                del self._running_jobs[job_id]
+            _metrics.add_time('job.run', time.perf_counter_ns() - run_started_ns)
+
+    async def _resolve_destinations(self, hosts: List[str]) -> Dict[str, int]:
+        """Resolve hosts to destination ids with one IN query, briefly cached
+
+        The result is memoized per host set for RESOLVE_CACHE_TTL seconds,
+        so repeat runs of the same job skip the query entirely while rare
+        destination changes are still picked up within a minute.
+        """
+        key = tuple(sorted(hosts))
+        now = asyncio.get_running_loop().time()
+
+        cached = self._dest_id_cache.get(key)
+        if cached and now - cached[0] < self.RESOLVE_CACHE_TTL:
+            return cached[1]
+
+        async with self.db.engine.connect() as conn:
+            rows = await conn.execute(
+                select(Destination.id, Destination.host)
+                .where(Destination.host.in_(hosts))
+            )
+            host_ids = {row.host: row.id for row in rows}
+
+        self._dest_id_cache[key] = (now, host_ids)
+        return host_ids
 
     async def _collect_ping_metric(self, job_id: int, destination_id: int,
-                                 destination_config: DestinationConfig, run_id: int):
+                                 destination_config: DestinationConfig, run_id: int,
+                                 collected_at: datetime) -> Dict:
         """
         Collect ping metric for a destination
 
+        Does no database work itself — the metric dict is returned so
+        _execute_job can insert the whole run as one batch. Failures also
+        yield a row (status 'failure') so the batch stays complete.
+
         Args:
             job_id: Job ID
             destination_id: Destination ID
             destination_config: Destination configuration
             run_id: Job run ID
+            collected_at: The run's timestamp, shared by every row of the run
+
+        Returns:
+            Metric row dict ready for batched insertion
         """
         try:
-            # Perform ping test
-            ping_result = await self.ping_collector.ping_host(
-                destination_config.host,
-                count=4,
-                timeout=5
-            )
+            # Perform ping test under a hard deadline — the collector's own
+            # timeout is per packet, so a blackholing host could otherwise
+            # hold its semaphore slot for the whole packet train
+            async with asyncio.timeout(self.COLLECT_TIMEOUT):
+                ping_result = await self.ping_collector.ping_async(
+                    destination_config.host,
+                    count=4,
+                    timeout=5
+                )
 
-            # Store metric in database
-            metric = MetricRecord(
-                job_id=job_id,
-                destination_id=destination_id,
-                metric_type="ping",
-                value=ping_result['latency_ms'],
-                unit="ms",
-                status="success" if ping_result['success'] else "failed",
-                timestamp=datetime.now(timezone.utc),
-                metadata={
+            logger.debug(f"Collected ping metric for {destination_config.host}: "
+                         f"{ping_result.get('avg_response_time_ms')}ms")
+
+            return {
+                'timestamp': collected_at,
+                'job_id': job_id,
+                'destination_id': destination_id,
+                'host': destination_config.host,
+                'metric_type': 'ping',
+                'status': 'success' if ping_result['success'] else 'failure',
+                'response_time_ms': ping_result.get('avg_response_time_ms'),
+                'additional_data': {
                     'run_id': run_id,
-                    'packet_loss': ping_result.get('packet_loss', 0),
-                    'jitter': ping_result.get('jitter_ms', 0),
-                    'min_latency': ping_result.get('min_latency_ms'),
-                    'max_latency': ping_result.get('max_latency_ms')
+                    'packet_loss': ping_result.get('packet_loss_percent', 0),
+                    'jitter': ping_result.get('jitter_ms'),
+                    'min_latency': ping_result.get('min_response_time_ms'),
+                    'max_latency': ping_result.get('max_response_time_ms')
                 }
-            )
-
-            async with self.db.async_session() as session:
-                session.add(metric)
-                await session.commit()
-
-            logger.debug(f"Stored ping metric for {destination_config.host}: {ping_result['latency_ms']}ms")
+            }
+
+        except TimeoutError:
+            logger.warning(f"Ping collection for {destination_config.host} exceeded "
+                           f"{self.COLLECT_TIMEOUT}s deadline")
+
+            return {
+                'timestamp': collected_at,
+                'job_id': job_id,
+                'destination_id': destination_id,
+                'host': destination_config.host,
+                'metric_type': 'ping',
+                'status': 'timeout',
+                'response_time_ms': None,
+                'additional_data': {
+                    'run_id': run_id,
+                    'error': f"collection deadline of {self.COLLECT_TIMEOUT}s exceeded"
+                }
+            }
 
         except Exception as e:
             logger.error(f"Failed to collect ping metric for {destination_config.host}: {e}")
 
-            # Store failed metric
-            metric = MetricRecord(
-                job_id=job_id,
-                destination_id=destination_id,
-                metric_type="ping",
-                value=0,
-                unit="ms",
-                status="failed",
-                timestamp=datetime.now(timezone.utc),
-                metadata={
+            # Same key set as the success row, so the whole run's batch
+            # shares one executemany statement instead of splitting by shape
+            return {
+                'timestamp': collected_at,
+                'job_id': job_id,
+                'destination_id': destination_id,
+                'host': destination_config.host,
+                'metric_type': 'ping',
+                'status': 'failure',
+                'response_time_ms': None,
+                'additional_data': {
                     'run_id': run_id,
                     'error': str(e)
                 }
-            )
-
-            async with self.db.async_session() as session:
-                session.add(metric)
-                await session.commit()
+            }
 
     async def _create_job_run(self, job_id: int, total_destinations: int) -> Optional[int]:
         """
@@ -353,37 +474,36 @@ class JobManager:
             Run ID if created successfully, None otherwise
         """
         try:
-            async with self.db.async_session() as session:
-                run = JobRun(
-                    job_id=job_id,
-                    start_time=datetime.now(timezone.utc),
-                    status="running",
-                    total_destinations=total_destinations,
-                    successful_destinations=0,
-                    failed_destinations=0
-                )
-
-                session.add(run)
-                await session.commit()
-                await session.refresh(run)
-
-                return run.id
+            # INSERT ... RETURNING id via the database layer — one round
+            # trip, no post-commit refresh SELECT
+            return await self.db.create_job_run(job_id, total_destinations)
 
         except Exception as e:
             logger.error(f"Failed to create job run for job {job_id}: {e}")
             return None
 
-    async def _complete_job_run(self, run_id: int, result: JobExecutionResult):
+    async def _finalize_run(self, run_id: int, job_id: int, interval: int,
+                            result: JobExecutionResult):
         """
-        Complete a job run record
+        Close out a finished run: update the run record and the job row
+
+        Both UPDATE statements run in one transaction, so the post-run path
+        costs a single commit instead of two.
 
         Args:
             run_id: Run ID
+            job_id: Job ID
+            interval: Job interval in seconds
             result: Execution result
         """
         try:
-            async with self.db.async_session() as session:
-                await session.execute(
+            next_run = result.end_time
+            if result.success:
+                # Schedule next run based on interval
+                next_run += timedelta(seconds=interval)
+
+            async with self.db.engine.begin() as conn:
+                await conn.execute(
                     update(JobRun)
                     .where(JobRun.id == run_id)
                     .values(
@@ -394,10 +514,23 @@ class JobManager:
                         error_message=result.error_message
                     )
                 )
-                await session.commit()
+                await conn.execute(
+                    update(Job)
+                    .where(Job.id == job_id)
+                    .values(
+                        last_run=result.end_time,
+                        next_run=next_run,
+                        enabled=result.success  # Disable job if it failed
+                    )
+                )
+
+            # Mirror the write so status queries stay answerable in memory
+            self._job_state[job_id] = (result.success, next_run)
+            if self.on_job_enabled_changed:
+                self.on_job_enabled_changed(job_id, result.success)
 
         except Exception as e:
-            logger.error(f"Failed to complete job run {run_id}: {e}")
+            logger.error(f"Failed to finalize job run {run_id}: {e}")
 
     async def _update_job_status(self, job_id: int, enabled: bool):
         """
@@ -416,36 +549,12 @@ class JobManager:
                 )
                 await session.commit()
 
+            cached = self._job_state.get(job_id)
+            if cached:
+                self._job_state[job_id] = (enabled, cached[1])
+            if self.on_job_enabled_changed:
+                self.on_job_enabled_changed(job_id, enabled)
+
         except Exception as e:
             logger.error(f"Failed to update job {job_id} status: {e}")
 
-    async def _update_job_after_run(self, job_id: int, interval: int, result: JobExecutionResult):
-        """
-        Update job information after a run
-
-        Args:
-            job_id: Job ID
-            interval: Job interval in seconds
-            result: Execution result
-        """
-        try:
-            next_run = datetime.now(timezone.utc)
-            if result.success:
-                # Schedule next run based on interval
-                from datetime import timedelta
-                next_run += timedelta(seconds=interval)
-
-            async with self.db.async_session() as session:
-                await session.execute(
-                    update(Job)
-                    .where(Job.id == job_id)
-                    .values(
-                        last_run=result.end_time,
-                        next_run=next_run,
-                        enabled=result.success  # Disable job if it failed
-                    )
-                )
-                await session.commit()
-
-        except Exception as e:
-            logger.error(f"Failed to update job {job_id} after run: {e}")
\ No newline at end of file
@@ -6,6 +6,8 @@ Supports interval-based scheduling and time window constraints.
 """
 
 import asyncio
+import heapq
+import itertools
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple
@@ -14,6 +16,7 @@ from sqlalchemy import select, update, and_, or_
 
 from src.core.database import Database, Job, JobRun
 from src.core.config import JobConfig
+from src.services import _metrics
 from src.services.job_manager import JobManager
 from src.services.destination_manager import DestinationManager
 
@@ -45,7 +48,30 @@ class Scheduler:
         self.destination_manager = destination_manager
         self._scheduler_task = None
         self._shutdown = False
-        self._scheduled_jobs: Dict[int, asyncio.Task] = {}
+        # Due jobs are handed to a fixed pool of workers through this queue
+        # instead of spawning a task per due job, so a burst of due work
+        # costs queue entries rather than a flood of new tasks
+        self._job_queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        # Pending runs live in a heap of (due_epoch, seq, job_id, config);
+        # _scheduled_jobs maps job_id to the seq of its live entry so stale
+        # heap entries (unscheduled or superseded) are skipped on pop
+        self._heap: List[Tuple[float, int, int, JobConfig]] = []
+        self._scheduled_jobs: Dict[int, int] = {}
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        # Parsed JobConfig per job id, keyed on the raw config text so a
+        # changed config re-parses while repeat scheduling hits the cache
+        self._config_cache: Dict[int, Tuple[str, JobConfig]] = {}
+        # Ids of jobs known to be enabled; spares a SELECT per execution.
+        # Kept honest by the job manager's enabled-change notifications —
+        # a failed run or an API stop disables the job in the database,
+        # and without the callback this set would keep saying "enabled"
+        # (and keep running the job) forever.
+        self._enabled_jobs: set = set()
+        job_manager.on_job_enabled_changed = self._on_job_enabled_changed
+        # Consecutive start failures per job, driving retry backoff
+        self._retry_counts: Dict[int, int] = {}
 
     async def start(self):
         """Start the scheduler"""
@@ -54,6 +80,11 @@ class Scheduler:
             return
 
         self._shutdown = False
+        self._enabled_jobs = {job.id for job in await self._get_enabled_jobs()}
+        self._workers = [
+            asyncio.create_task(self._worker_loop())
+            for _ in range(self.WORKER_COUNT)
+        ]
         self._scheduler_task = asyncio.create_task(self._scheduler_loop())
         logger.info("Job scheduler started")
 
@@ -71,15 +102,17 @@ class Scheduler:
         except asyncio.CancelledError:
             pass
 
-        # Cancel all scheduled jobs
-        for job_id, task in self._scheduled_jobs.items():
-            if not task.done():
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._workers.clear()
 
+        # Drop all pending runs
+        self._heap.clear()
         self._scheduled_jobs.clear()
         logger.info("Job scheduler stopped")
 
@@ -107,18 +140,15 @@ class Scheduler:
                 logger.warning(f"Cannot schedule job {job_id}: no valid run time")
                 return False
 
-            # Create scheduling task
-            delay = (next_run_time - datetime.now(timezone.utc)).total_seconds()
-            if delay < 0:
-                delay = 0  # Run immediately if time is in the past
-
-            task = asyncio.create_task(self._delayed_job_execution(job_id, job_config, delay))
-            self._scheduled_jobs[job_id] = task
+            # Queue the run and wake the loop to recompute its deadline
+            self._push(job_id, job_config, next_run_time)
+            self._enabled_jobs.add(job_id)
+            _metrics.incr('job.schedule')
 
             # Update job record with next run time
             await self._update_job_next_run(job_id, next_run_time)
 
-            logger.info(f"Scheduled job {job_id} to run in {delay:.1f} seconds")
+            logger.info(f"Scheduled job {job_id} to run at {next_run_time.isoformat()}")
             return True
 
         except Exception as e:
@@ -136,10 +166,11 @@ class Scheduler:
             True if job unscheduled successfully, False otherwise
         """
         try:
-            if job_id in self._scheduled_jobs:
-                task = self._scheduled_jobs[job_id]
-                task.cancel()
-                del self._scheduled_jobs[job_id]
+            # Invalidate the live heap entry; the loop discards it on pop
+            self._scheduled_jobs.pop(job_id, None)
+            self._config_cache.pop(job_id, None)
+            self._enabled_jobs.discard(job_id)
+            self._wake.set()
 
             # Update job record to clear next run time
             await self._update_job_next_run(job_id, None)
@@ -164,7 +195,7 @@ class Scheduler:
             scheduled_count = 0
 
             for job in jobs:
-                job_config = JobConfig.parse_raw(job.config)
+                job_config = self._get_job_config(job)
                 if await self.schedule_job(job.id, job_config):
                     scheduled_count += 1
 
@@ -175,83 +206,139 @@ class Scheduler:
             logger.error(f"Failed to schedule jobs: {e}")
             return 0
 
+    # Longest the loop sleeps without waking; each timeout at this cap also
+    # runs the missed-job safety net
+    MAX_IDLE_WAIT = 300.0
+
+    # Retry delay after a failed start: doubles per consecutive failure,
+    # bounded so a flapping job cannot be deferred indefinitely
+    RETRY_BASE_DELAY = 60.0
+    RETRY_MAX_DELAY = 900.0
+
+    # Workers draining the due-job queue; the runs themselves are tasks
+    # owned by the job manager, this only bounds concurrent start paths
+    WORKER_COUNT = 4
+
+    def _push(self, job_id: int, job_config: JobConfig, when: datetime):
+        """Queue a run on the heap and wake the scheduler loop"""
+        seq = next(self._seq)
+        heapq.heappush(self._heap, (when.timestamp(), seq, job_id, job_config))
+        self._scheduled_jobs[job_id] = seq
+        self._wake.set()
+
     async def _scheduler_loop(self):
-        """Main scheduler loop"""
+        """Event-driven scheduler loop
+
+        Sleeps exactly until the earliest queued run (or until schedule_job
+        wakes it with new work) instead of polling every 30 seconds, pops
+        everything due in O(log n), and falls back to the missed-job sweep
+        only when idle for MAX_IDLE_WAIT.
+        """
         logger.info("Scheduler loop started")
 
         while not self._shutdown:
             try:
-                # Clean up completed scheduled tasks
-                await self._cleanup_completed_tasks()
-
-                # Check for jobs that need to be rescheduled
-                await self._reschedule_jobs()
-
-                # Sleep for a short interval
-                await asyncio.sleep(30)  # Check every 30 seconds
+                _metrics.incr('scheduler.tick')
+                self._wake.clear()
+
+                # Discard entries invalidated by unschedule_job or replaced
+                # by a newer push for the same job
+                while self._heap and self._scheduled_jobs.get(self._heap[0][2]) != self._heap[0][1]:
+                    heapq.heappop(self._heap)
+
+                if not self._heap:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=self.MAX_IDLE_WAIT)
+                    except asyncio.TimeoutError:
+                        await self._reschedule_jobs()
+                    continue
+
+                delay = self._heap[0][0] - datetime.now(timezone.utc).timestamp()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(),
+                                               timeout=min(delay, self.MAX_IDLE_WAIT))
+                        continue  # new work arrived; recompute the deadline
+                    except asyncio.TimeoutError:
+                        if delay > self.MAX_IDLE_WAIT:
+                            await self._reschedule_jobs()
+                            continue
+
+                # Hand everything due to the worker pool; put_nowait keeps
+                # the loop's own latency independent of how much is due
+                now = datetime.now(timezone.utc).timestamp()
+                while self._heap and self._heap[0][0] <= now:
+                    _, seq, job_id, job_config = heapq.heappop(self._heap)
+                    if self._scheduled_jobs.get(job_id) != seq:
+                        continue
+                    del self._scheduled_jobs[job_id]
+                    self._job_queue.put_nowait((job_id, job_config))
 
             except asyncio.CancelledError:
                 logger.info("Scheduler loop cancelled")
                 break
             except Exception as e:
                 logger.error(f"Error in scheduler loop: {e}")
-                await asyncio.sleep(60)  # Wait longer on error
+                await asyncio.sleep(1)
 
         logger.info("Scheduler loop stopped")
 
-    async def _delayed_job_execution(self, job_id: int, job_config: JobConfig, delay: float):
-        """
-        Execute a job after a delay
+    async def _worker_loop(self):
+        """Drain the due-job queue
 
-        Args:
-            job_id: Job ID
-            job_config: Job configuration
-            delay: Delay in seconds
+        A fixed pool of these replaces one asyncio.create_task per due
+        job: bursts of due work queue up instead of flooding the loop
+        with task objects, and a failure in one start never goes
+        unobserved in a dangling task.
+        """
+        while True:
+            job_id, job_config = await self._job_queue.get()
+            try:
+                await self._run_due_job(job_id, job_config)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Worker failed to run job {job_id}: {e}")
+            finally:
+                self._job_queue.task_done()
+
+    def _retry_time(self, job_id: int) -> datetime:
+        """Next attempt time for a job whose start failed, with backoff"""
+        failures = self._retry_counts.get(job_id, 0) + 1
+        self._retry_counts[job_id] = failures
+        delay = min(self.RETRY_BASE_DELAY * (2 ** (failures - 1)), self.RETRY_MAX_DELAY)
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+    async def _run_due_job(self, job_id: int, job_config: JobConfig):
+        """Start a due job and queue its next occurrence
+
+        The next attempt is always pushed onto the heap before this frame
+        exits — never awaited from a held stack and never slept out in
+        place — so failures cost a heap entry, not a parked coroutine.
         """
         try:
-            if delay > 0:
-                await asyncio.sleep(delay)
-
             # Check if job is still enabled
             if not await self._is_job_enabled(job_id):
                 logger.info(f"Job {job_id} is no longer enabled, skipping execution")
                 return
 
-            # Time window checking not implemented - skip this check
-            # if not await self._is_within_time_window(job_id):
-            #     logger.info(f"Job {job_id} is not within execution time window, skipping")
-            #     # Reschedule for next valid time
-            #     await self.schedule_job(job_id, job_config)
-            #     return
-
-            # Start job execution
             logger.info(f"Executing scheduled job {job_id}")
             started = await self.job_manager.start_job(job_id, job_config)
-
             if started:
-                # Reschedule for next interval
-                await self.schedule_job(job_id, job_config)
+                self._retry_counts.pop(job_id, None)
+                next_run_time = self._calculate_next_run(job_config)
             else:
                 logger.error(f"Failed to start job {job_id}")
-                # Try to reschedule with a delay
-                await asyncio.sleep(60)  # Wait 1 minute before retrying
-                await self.schedule_job(job_id, job_config)
+                next_run_time = self._retry_time(job_id)
+
+            # Queue the next occurrence directly — the job is running now,
+            # so schedule_job's already-running guard would reject it
+            self._push(job_id, job_config, next_run_time)
+            await self._update_job_next_run(job_id, next_run_time)
 
-        except asyncio.CancelledError:
-            logger.info(f"Cancelled scheduled job {job_id}")
         except Exception as e:
             logger.error(f"Error executing scheduled job {job_id}: {e}")
-            # Try to reschedule after error
-            await asyncio.sleep(300)  # Wait 5 minutes before retrying
-            try:
-                await self.schedule_job(job_id, job_config)
-            except Exception:
-                pass
-
-        finally:
-            # Remove from scheduled jobs
-            if job_id in self._scheduled_jobs:
-                del self._scheduled_jobs[job_id]
+            self._push(job_id, job_config, self._retry_time(job_id))
 
     def _calculate_next_run(self, job_config: JobConfig) -> Optional[datetime]:
         """
@@ -290,23 +377,59 @@ class Scheduler:
     #     """Check if current time is within job's time windows"""
     #     return True  # Always allow execution since time windows are not implemented
 
+    def _get_job_config(self, job: Job) -> JobConfig:
+        """Parse a job's config, reusing the cached object when unchanged
+
+        Pydantic validation costs tens of microseconds per call and the raw
+        text rarely changes between scheduler passes, so compare it against
+        the cached entry and only re-parse on a miss.
+        """
+        cached = self._config_cache.get(job.id)
+        if cached and cached[0] == job.config:
+            return cached[1]
+
+        job_config = JobConfig.parse_raw(job.config)
+        self._config_cache[job.id] = (job.config, job_config)
+        return job_config
+
+    def _on_job_enabled_changed(self, job_id: int, enabled: bool):
+        """Mirror an enabled-flag write from the job manager
+
+        Disables matter most: dropping the id here makes the next due
+        check fall through to the database, which skips the job.
+        """
+        if enabled:
+            self._enabled_jobs.add(job_id)
+        else:
+            self._enabled_jobs.discard(job_id)
+
     async def _is_job_enabled(self, job_id: int) -> bool:
         """
         Check if a job is still enabled
 
+        Answered from the in-memory enabled set maintained by
+        schedule_job/unschedule_job, so the common per-execution check
+        costs a set lookup; only a miss falls back to the database.
+
         Args:
             job_id: Job ID
 
         Returns:
             True if job is enabled, False otherwise
         """
+        if job_id in self._enabled_jobs:
+            return True
+
         try:
             async with self.db.async_session() as session:
                 result = await session.execute(
                     select(Job.enabled)
                     .where(Job.id == job_id)
                 )
-                return result.scalar_one() or False
+                enabled = result.scalar_one() or False
+                if enabled:
+                    self._enabled_jobs.add(job_id)
+                return enabled
 
         except Exception as e:
             logger.error(f"Failed to check if job {job_id} is enabled: {e}")
@@ -352,42 +475,40 @@ class Scheduler:
         except Exception as e:
             logger.error(f"Failed to update next run time for job {job_id}: {e}")
 
-    async def _cleanup_completed_tasks(self):
-        """Clean up completed scheduled tasks"""
-        completed_jobs = []
-        for job_id, task in self._scheduled_jobs.items():
-            if task.done():
-                completed_jobs.append(job_id)
-
-        for job_id in completed_jobs:
-            del self._scheduled_jobs[job_id]
-
-        if completed_jobs:
-            logger.debug(f"Cleaned up {len(completed_jobs)} completed scheduled tasks")
-
     async def _reschedule_jobs(self):
         """Reschedule jobs that should be running but aren't"""
         try:
+            _metrics.incr('scheduler.reschedule_sweep')
             # Get jobs that have passed their next run time but aren't running or scheduled
             now = datetime.now(timezone.utc)
             running_jobs = await self.job_manager.get_running_jobs()
             scheduled_jobs = set(self._scheduled_jobs.keys())
 
+            # Keep the WHERE clause to what idx_jobs_enabled_next_run can
+            # answer; the running/scheduled exclusion is a set lookup here
+            # rather than an IN list of N bind parameters in the SQL plan
             async with self.db.async_session() as session:
                 result = await session.execute(
                     select(Job)
                     .where(and_(
                         Job.enabled == True,
-                        Job.next_run <= now,
-                        Job.id.notin_(list(running_jobs | scheduled_jobs))
+                        Job.next_run <= now
                     ))
+                    .limit(100)
                 )
                 jobs_to_reschedule = result.scalars().all()
 
-                for job in jobs_to_reschedule:
-                    job_config = JobConfig.parse_raw(job.config)
+                skip = running_jobs | scheduled_jobs
+                for index, job in enumerate(jobs_to_reschedule):
+                    if job.id in skip:
+                        continue
+                    job_config = self._get_job_config(job)
                     logger.info(f"Rescheduling job {job.id} that missed its run time")
                     await self.schedule_job(job.id, job_config)
+                    # A large sweep re-parses configs in a tight loop; yield
+                    # periodically so due jobs keep firing during it
+                    if index % 32 == 31:
+                        await asyncio.sleep(0)
 
         except Exception as e:
             logger.error(f"Failed to reschedule jobs: {e}")
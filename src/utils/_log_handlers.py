@@ -0,0 +1,134 @@
+"""
+Custom logging handlers for Network Stats Collector
+
+Lives in its own module so importing src.utils.logging does not pull
+in logging.handlers (and its socket/pickle transitive imports); the
+classes are loaded on the first setup_logging call instead.
+"""
+
+import io
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+
+class FastRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that sizes the file from a byte counter
+
+    The stock shouldRollover asks the stream for its position on every
+    record — an lseek syscall per emit. This tracks written bytes in an
+    integer seeded from the existing file size at open, so the
+    per-record rollover check is one comparison.
+
+    The stream is also opened as a raw append-mode fd behind a 64 KiB
+    BufferedWriter rather than a TextIOWrapper: emit encodes the line
+    once and hands bytes straight to the buffer, skipping the text
+    layer's per-write codec machinery. ERROR and above flush through to
+    disk immediately; everything else rides the buffer until the
+    periodic flush, rollover or close.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._bytes_written = 0
+        super().__init__(*args, **kwargs)
+        try:
+            self._bytes_written = os.path.getsize(self.baseFilename)
+        except OSError:
+            self._bytes_written = 0
+
+    def shouldRollover(self, record):
+        return self.maxBytes > 0 and self._bytes_written >= self.maxBytes
+
+    def _open(self):
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        # O_CLOEXEC does not exist on Windows
+        flags |= getattr(os, "O_CLOEXEC", 0)
+        fd = os.open(self.baseFilename, flags, 0o644)
+        return io.BufferedWriter(io.FileIO(fd, "ab", closefd=True),
+                                 buffer_size=65536)
+
+    def emit(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            data = (self.format(record) + "\n").encode("utf-8",
+                                                       errors="replace")
+            self.stream.write(data)
+            self._bytes_written += len(data)
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        # The stock rollover shuffles every backup through a stat+rename
+        # chain (.4 -> .5, .3 -> .4, ...) while holding the handler lock.
+        # One atomic rename to a timestamped name gets the live file out
+        # of the way in a single syscall; a background thread prunes old
+        # backups outside the lock.
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        try:
+            os.rename(self.baseFilename,
+                      f"{self.baseFilename}.{time.time_ns()}")
+        except OSError:
+            pass
+        self._bytes_written = 0
+        if not self.delay:
+            self.stream = self._open()
+        threading.Thread(target=self._prune_backups, daemon=True).start()
+
+    def _prune_backups(self):
+        """Unlink rolled files beyond backupCount, newest kept first"""
+        prefix = os.path.basename(self.baseFilename) + "."
+        dirname = os.path.dirname(self.baseFilename) or "."
+        try:
+            backups = [os.path.join(dirname, name)
+                       for name in os.listdir(dirname)
+                       if name.startswith(prefix)]
+            backups.sort(key=os.path.getmtime, reverse=True)
+            for stale in backups[self.backupCount:]:
+                try:
+                    os.unlink(stale)
+                except OSError:
+                    pass
+        except OSError:
+            pass
+
+
+class PassthroughQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that enqueues records as-is
+
+    The stock prepare() formats the record on the producer side so it
+    survives pickling across processes. The queue here is in-process,
+    so skip that and keep all formatting on the listener thread.
+
+    Works with a bounded queue: when a log burst outpaces the listener
+    and the queue fills, records below ERROR are dropped and counted
+    instead of growing memory without limit, while ERROR and above
+    block until space frees so failures are never lost.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.ERROR:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
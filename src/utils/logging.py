@@ -5,56 +5,282 @@ Provides centralized logging configuration with proper formatting
 and support for both console and file output.
 """
 
+import atexit
 import logging
-import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
 from typing import Optional
 
+# logging.handlers (and the socket/pickle machinery it drags in) is
+# deliberately not imported here: setup_logging and the custom handler
+# classes in src.utils._log_handlers pull it on first use, keeping the
+# import of this module cheap.
+
+# The active QueueListener, kept so a repeat setup_logging call (tests,
+# reload) can stop the previous consumer thread before starting a new one
+_listener = None
+
+# Timer driving the periodic flush of the buffered file handler
+_flush_timer: Optional[threading.Timer] = None
+
+# Level-name table: one dict hash instead of a string-built getattr
+# through the logging module's __getattr__ per lookup
+_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+# Deploy-time log ceiling: NSC_MAX_LOG_LEVEL=WARNING cuts everything
+# below WARNING globally at the isEnabledFor integer compare, without
+# touching call sites — e.g. a stray logger.debug(expensive()) in
+# production. Read once at import; re-applied after setup_logging
+# adjusts levels.
+_MAX_LEVEL_NAME = os.environ.get("NSC_MAX_LOG_LEVEL")
+
+
+def _apply_max_level():
+    """Raise the global disable threshold to the env-configured ceiling"""
+    if not _MAX_LEVEL_NAME:
+        return
+    threshold = _LEVELS.get(_MAX_LEVEL_NAME.upper(), 0) - 1
+    # Only ever tighten: a configured DEBUG setup must not undo it, and
+    # a bogus env value must not loosen the configured level
+    if threshold > logging.root.manager.disable:
+        logging.disable(threshold)
+
+
+_apply_max_level()
+
+# Arguments of the last applied configuration; a repeat call with the
+# same values returns immediately instead of tearing the listener and
+# handlers down just to rebuild them identically
+_CONFIG_FINGERPRINT: Optional[tuple] = None
+
+# Upper bound on queued records: caps memory under log bursts. Records
+# below ERROR are dropped (and counted) once the queue is full.
+_QUEUE_CAPACITY = 10000
+
+# The active queue handler, kept for the dropped-record counter
+_queue_handler = None
+
+# Records buffered in memory before one batched write to the log file;
+# ERROR and above flush immediately, everything else waits for the
+# buffer to fill or the interval to pass
+_FILE_BUFFER_CAPACITY = 512
+_FILE_FLUSH_INTERVAL = 30.0
+
+
+def _stop_listener():
+    """Stop the active listener, flushing anything still queued"""
+    global _listener, _flush_timer
+    if _flush_timer is not None:
+        _flush_timer.cancel()
+        _flush_timer = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _start_flush_timer(buffered_handler):
+    """Flush the file buffer every _FILE_FLUSH_INTERVAL seconds
+
+    Rearms itself after each flush; cancelled on reconfiguration and at
+    exit by _stop_listener. Shutdown flushing itself is covered by
+    flushOnClose via logging.shutdown.
+    """
+    global _flush_timer
+
+    def _tick():
+        buffered_handler.flush()
+        # Push the records through the file handler's write buffer too,
+        # so a quiet period cannot strand lines in the BufferedWriter
+        if buffered_handler.target is not None:
+            buffered_handler.target.flush()
+        _start_flush_timer(buffered_handler)
+
+    _flush_timer = threading.Timer(_FILE_FLUSH_INTERVAL, _tick)
+    _flush_timer.daemon = True
+    _flush_timer.start()
+
+
+# One registration covers every reconfiguration; stop() is idempotent
+# through the guard above
+atexit.register(_stop_listener)
+
+
+class FastFormatter(logging.Formatter):
+    """Formatter for the default layout with a cached timestamp
+
+    The stock Formatter re-interpolates the %-format and runs
+    strftime/localtime for every record. Adjacent records usually share
+    the same wall-clock second, so the date/time prefix is cached per
+    second and the line is assembled with one f-string. Only used for
+    the default format; custom formats fall back to logging.Formatter.
+    All formatting runs on the single listener thread, so the cache
+    needs no locking.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._last_sec = -1
+        self._last_str = ""
+
+    def format(self, record):
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(sec)
+            )
+            self._last_sec = sec
+
+        line = (f"{self._last_str},{int(record.msecs):03d} - "
+                f"{record.name} - {record.levelname} - {record.getMessage()}")
+
+        # Rare paths, handled the same way the stock Formatter does
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        if record.stack_info:
+            line = f"{line}\n{self.formatStack(record.stack_info)}"
+        return line
+
 
 def setup_logging(
     level: str = "INFO",
     log_file: Optional[Path] = None,
-    log_format: Optional[str] = None
+    log_format: Optional[str] = None,
+    use_syslog: bool = False,
+    syslog_address="/dev/log",
 ) -> None:
     """
     Setup logging configuration for the application
 
+    Handlers are not attached to the root logger directly: emitting a
+    record only enqueues it, and a single QueueListener thread does all
+    formatting and I/O. Log calls from asyncio code therefore never
+    block on stdout or file writes.
+
+    Levels below the configured one are cut off with logging.disable,
+    so a suppressed debug call returns after one integer compare in
+    isEnabledFor instead of building a LogRecord and walking the
+    handler chain. Call sites with expensive arguments should still
+    guard with `if logger.isEnabledFor(logging.DEBUG):` since argument
+    evaluation happens before logging is entered at all.
+
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Path to log file (optional)
         log_format: Custom log format string (optional)
+        use_syslog: Send records to syslog instead of the rotating file.
+            Datagram syslog is fire-and-forget — no flush, no rotation —
+            with the daemon owning durability, so it is the cheapest
+            production sink where one is available.
+        syslog_address: Syslog socket path, or a (host, port) tuple for
+            UDP syslog in containers
     """
-    # Default format
-    if log_format is None:
-        log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    global _listener, _queue_handler, _CONFIG_FINGERPRINT
+
+    # Same arguments as the active configuration: nothing to do. Saves
+    # the full teardown/rebuild cycle on repeated calls (tests, reload).
+    fingerprint = (level, str(log_file), log_format, use_syslog,
+                   str(syslog_address))
+    if fingerprint == _CONFIG_FINGERPRINT:
+        return
 
     # Convert level string to logging constant
-    numeric_level = getattr(logging, level.upper(), logging.INFO)
+    numeric_level = _LEVELS.get(level.upper(), logging.INFO)
 
-    # Create formatter
-    formatter = logging.Formatter(log_format)
+    # Create formatter: the fast path covers the default layout, custom
+    # formats keep the general-purpose Formatter
+    if log_format is None:
+        formatter = FastFormatter()
+    else:
+        formatter = logging.Formatter(log_format)
 
     # Setup root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(numeric_level)
 
-    # Clear existing handlers
+    # Everything below the configured level short-circuits on one int
+    # compare, before any LogRecord is allocated; the env ceiling wins
+    # if it is stricter
+    logging.disable(numeric_level - 1)
+    _apply_max_level()
+
+    # Thread/process ids are never referenced by our format; skipping
+    # them removes a current_thread()/getpid() lookup per record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    # Neither format references pathname/lineno/funcName, yet every emit
+    # still pays a sys._getframe stack walk to resolve them. Clearing
+    # _srcfile (private but stable since 2.x) makes findCaller return
+    # placeholders without touching frames.
+    logging._srcfile = None
+
+    # Tear down any previous configuration
+    _stop_listener()
     root_logger.handlers.clear()
 
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(numeric_level)
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    # Build the real sinks but keep them off the root logger — they are
+    # driven by the listener thread instead
+    sink_handlers = []
+
+    # Console handler. On a TTY it is always wanted; when stdout is a
+    # pipe (docker, systemd) the supervisor already captures it, so
+    # duplicating the file or syslog sink there just doubles the I/O —
+    # attach it only when it would be the sole sink.
+    if sys.stdout.isatty() or (not log_file and not use_syslog):
+        if not sys.stdout.isatty():
+            # Piped stdout is block-buffered; line buffering keeps lines
+            # promptly visible without paying a flush per record
+            try:
+                sys.stdout.reconfigure(line_buffering=True)
+            except (AttributeError, OSError):
+                pass
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(numeric_level)
+        console_handler.setFormatter(formatter)
+        # Handler.format re-resolves self.formatter per record; binding
+        # the method drops that indirection on the emit path
+        console_handler.format = formatter.format
+        sink_handlers.append(console_handler)
+
+    if use_syslog:
+        from logging.handlers import SysLogHandler
+
+        # The listener thread still does the sendto, so even that one
+        # syscall stays off the event loop
+        syslog_handler = SysLogHandler(address=syslog_address)
+        syslog_handler.setLevel(numeric_level)
+        syslog_handler.setFormatter(formatter)
+        syslog_handler.format = formatter.format
+        sink_handlers.append(syslog_handler)
+
+    # File handler (if specified, and not superseded by syslog)
+    if log_file and not use_syslog:
+        from logging.handlers import MemoryHandler
 
-    # File handler (if specified)
-    if log_file:
-        # Create log directory if it doesn't exist
-        log_file.parent.mkdir(parents=True, exist_ok=True)
+        from src.utils._log_handlers import FastRotatingFileHandler
+
+        # Create log directory if it doesn't exist. The stat is served
+        # from the dentry cache on the common already-exists path, which
+        # is cheaper than an unconditional mkdir syscall round trip.
+        parent = log_file.parent
+        if not parent.is_dir():
+            parent.mkdir(parents=True, exist_ok=True)
 
         # Use rotating file handler to prevent huge log files
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = FastRotatingFileHandler(
             log_file,
             maxBytes=10 * 1024 * 1024,  # 10MB
             backupCount=5,
@@ -62,22 +288,85 @@ def setup_logging(
         )
         file_handler.setLevel(numeric_level)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        file_handler.format = formatter.format
+
+        # Buffer records and write the file in batches: one write per
+        # _FILE_BUFFER_CAPACITY records instead of one per record.
+        # ERROR and above bypass the buffer so failures hit disk
+        # immediately; the timer bounds how stale INFO lines can get.
+        buffered_handler = MemoryHandler(
+            capacity=_FILE_BUFFER_CAPACITY,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True,
+        )
+        sink_handlers.append(buffered_handler)
+        _start_flush_timer(buffered_handler)
+
+    # A log call costs one queue.put of the record; the listener thread
+    # owns the handlers, their locks and every write syscall
+    from logging.handlers import QueueListener
+
+    from src.utils._log_handlers import PassthroughQueueHandler
+
+    # Bounded so a burst the listener cannot keep up with costs dropped
+    # INFO lines, not unbounded memory; ERROR+ always gets through
+    log_queue = queue.Queue(maxsize=_QUEUE_CAPACITY)
+    _queue_handler = PassthroughQueueHandler(log_queue)
+    root_logger.addHandler(_queue_handler)
+    _listener = QueueListener(
+        log_queue, *sink_handlers, respect_handler_level=True
+    )
+    _listener.start()
 
     # Configure specific loggers
     _configure_specific_loggers()
 
+    _CONFIG_FINGERPRINT = fingerprint
+
+
+def dropped_log_records() -> int:
+    """Records dropped because the log queue was full (0 when unset up)
+
+    A hook for a future metrics endpoint; nothing reads it yet.
+    """
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+# Third-party loggers quieted to these levels: SQLAlchemy can be very
+# verbose, uvicorn access logs stay at INFO, HTTP client libraries at
+# WARNING. Target levels never change at runtime.
+_NOISY = (
+    ("sqlalchemy.engine", logging.WARNING),
+    ("sqlalchemy.pool", logging.WARNING),
+    ("uvicorn.access", logging.INFO),
+    ("httpx", logging.WARNING),
+    ("aiohttp", logging.WARNING),
+)
+
+# Logger objects resolved once; getLogger takes the manager lock and a
+# loggerDict probe per name, which repeated setups need not repay
+_noisy_cached = None
+
 
 def _configure_specific_loggers():
     """Configure logging levels for specific modules"""
+    global _noisy_cached
 
-    # SQLAlchemy - can be very verbose
-    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
-    logging.getLogger("sqlalchemy.pool").setLevel(logging.WARNING)
+    if _noisy_cached is None:
+        _noisy_cached = [(logging.getLogger(name), level)
+                         for name, level in _NOISY]
 
-    # UVicorn access logs
-    logging.getLogger("uvicorn.access").setLevel(logging.INFO)
+    for noisy_logger, level in _noisy_cached:
+        noisy_logger.setLevel(level)
 
-    # HTTP client libraries
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("aiohttp").setLevel(logging.WARNING)
\ No newline at end of file
+    # aiohttp's access logging alone costs a sizable slice of server
+    # throughput, and a raised level still pays message construction.
+    # Detach it from the root entirely: with propagate off and only a
+    # NullHandler attached, an access-log emit returns without ever
+    # reaching a formatter.
+    access_logger = logging.getLogger("aiohttp.access")
+    access_logger.setLevel(logging.WARNING)
+    access_logger.propagate = False
+    if not access_logger.handlers:
+        access_logger.addHandler(logging.NullHandler())
\ No newline at end of file
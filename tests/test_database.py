@@ -0,0 +1,63 @@
+"""Tests for the database layer
+
+Run with: python -m unittest tests.test_database
+"""
+import os
+import tempfile
+import unittest
+
+from src.core.database import Database
+
+
+class BulkUpdateDestinationsTest(unittest.IsolatedAsyncioTestCase):
+    """bulk_update_destinations must actually persist its batch
+
+    The health-sweep writer in DestinationManager only logs failures, so a
+    broken bulk update is invisible at runtime — this round-trips the
+    values to catch regressions.
+    """
+
+    async def asyncSetUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.db = Database(f'sqlite:///{self.db_path}')
+        await self.db.initialize()
+
+    async def asyncTearDown(self):
+        if self.db.metric_buffer:
+            await self.db.metric_buffer.stop()
+        if self.db.engine:
+            await self.db.engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            path = self.db_path + suffix
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def _create_destination(self, name: str) -> int:
+        return await self.db.create_destination({
+            'name': name,
+            'display_name': name,
+            'host': f'{name}.example.com',
+            'description': '',
+            'tags': '[]',
+        })
+
+    async def test_bulk_update_round_trips(self):
+        first = await self._create_destination('one')
+        second = await self._create_destination('two')
+
+        updated = await self.db.bulk_update_destinations([
+            {'id': first, 'status': 'down'},
+            {'id': second, 'status': 'inactive'},
+        ])
+        self.assertEqual(updated, 2)
+
+        self.assertEqual((await self.db.get_destination(first)).status, 'down')
+        self.assertEqual((await self.db.get_destination(second)).status, 'inactive')
+
+    async def test_bulk_update_empty_batch_is_noop(self):
+        self.assertEqual(await self.db.bulk_update_destinations([]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()